@@ -3,6 +3,7 @@ import matplotlib.pyplot as plt
 from matplotlib import animation
 from typing import Dict, Any, Tuple, List
 import copy
+from concurrent.futures import ThreadPoolExecutor
 
 from src.core.simulation import run_simulation as _run_simulation
 from src.visualization.comparison_plots import plot_kdir_comparison, create_comparison_summary
@@ -24,19 +25,26 @@ def run_comparison_simulation(args) -> Dict[str, Any]:
     print("🔄 Running Comparison Simulation...")
     print("=" * 50)
     
-    # Store original args
-    original_llm = args.llm
-    original_animation = args.no_animation
-    
-    # Keep original animation setting
-    
-    print("Step 1: Running Baseline Simulation (No LLM)...")
-    args.llm = 0  # Disable LLM for baseline
-    baseline_results = _run_simulation(args, return_data=True)
-    
-    print("\n Step 2: Running LLM Simulation...")
-    args.llm = 1  # Enable LLM
-    llm_results = _run_simulation(args, return_data=True)
+    # Each leg gets its own copy of the arguments; neither leg's animation
+    # or plots would be looked at, so both are rendered headless
+    baseline_args = copy.copy(args)
+    baseline_args.llm = 0  # Disable LLM for baseline
+    baseline_args.no_animation = True
+    llm_args = copy.copy(args)
+    llm_args.llm = 1  # Enable LLM
+    llm_args.no_animation = True
+    
+    # Each leg draws its vessel noise from its own generator, seeded from the global
+    # RNG here, so parallel legs stay reproducible under np.random.seed
+    baseline_rng, llm_rng = (np.random.default_rng(seed) for seed in np.random.randint(0, 2**31, size=2))
+    
+    # The LLM leg mostly waits on the network, so run both legs side by side
+    print("Steps 1-2: Running Baseline (No LLM) and LLM Simulations in parallel...")
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        baseline_future = executor.submit(_run_simulation, baseline_args, return_data=True, rng=baseline_rng)
+        llm_future = executor.submit(_run_simulation, llm_args, return_data=True, rng=llm_rng)
+        baseline_results = baseline_future.result()
+        llm_results = llm_future.result()
     
     print("\n Step 3: Creating Comparison Plots...")
     
@@ -63,11 +71,6 @@ def run_comparison_simulation(args) -> Dict[str, Any]:
         llm_provider=args.llm_provider or 'LLM'
     )
     
-    
-    # Restore original args
-    args.llm = original_llm
-    args.no_animation = original_animation
-    
     return {
         'baseline': baseline_results,
         'llm': llm_results,
@@ -88,25 +91,31 @@ def calculate_comparison_stats(baseline_results: Dict, llm_results: Dict, args)
     risk_baseline = baseline_results['risk']
     risk_llm = llm_results['risk']
     
+    # Positive-risk masks, reused for the masked means below
+    mask_baseline = risk_baseline > 0
+    mask_llm = risk_llm > 0
+    
     # Calculate statistics
     baseline_stats = {
-        'total_turns': np.sum(np.abs(kdir_baseline) > 0.1),
-        'max_risk': np.max(risk_baseline),
-        'avg_risk': np.mean(risk_baseline[risk_baseline > 0]),
-        'final_distance': np.sqrt(baseline_results['x'][-1]**2 + baseline_results['y'][-1]**2) / 1852,
+        'total_turns': np.count_nonzero(np.abs(kdir_baseline) > 0.1),
+        'max_risk': risk_baseline.max(),
+        'avg_risk': risk_baseline.sum(where=mask_baseline) / max(np.count_nonzero(mask_baseline), 1),
+        'final_distance': np.hypot(baseline_results['x'][-1], baseline_results['y'][-1]) / 1852,
         'sim_time': args.sim_time
     }
     
     llm_stats = {
-        'total_turns': np.sum(np.abs(kdir_llm) > 0.1),
-        'max_risk': np.max(risk_llm),
-        'avg_risk': np.mean(risk_llm[risk_llm > 0]),
-        'final_distance': np.sqrt(llm_results['x'][-1]**2 + llm_results['y'][-1]**2) / 1852,
+        'total_turns': np.count_nonzero(np.abs(kdir_llm) > 0.1),
+        'max_risk': risk_llm.max(),
+        'avg_risk': risk_llm.sum(where=mask_llm) / max(np.count_nonzero(mask_llm), 1),
+        'final_distance': np.hypot(llm_results['x'][-1], llm_results['y'][-1]) / 1852,
         'sim_time': args.sim_time
     }
     
     # Calculate agreement
-    turn_agreement = np.mean(np.sign(kdir_baseline) == np.sign(kdir_llm))
+    sign_baseline = np.sign(kdir_baseline)
+    sign_llm = np.sign(kdir_llm)
+    turn_agreement = np.mean(sign_baseline == sign_llm)
     baseline_stats['turn_agreement'] = f"{turn_agreement:.1%}"
     
     # Path efficiency difference
@@ -1,4 +1,9 @@
-def integration(x_0, x_dot, dt):
+import numpy as np
+from src.utils.jit import jit_kernel
+
+
+@jit_kernel
+def integration(x_0, x_dot, dt, out=None):
     """
     Perform first-order Euler integration.
 
@@ -6,8 +11,13 @@ def integration(x_0, x_dot, dt):
     x_0 (float or numpy.array): Initial state
     x_dot (float or numpy.array): Rate of change
     dt (float): Time step
+    out (numpy.array, optional): Preallocated array to write the result into
 
     Returns:
-    float or numpy.array: Integrated state
+    float or numpy.array: Integrated state (``out`` when given)
     """
-    return x_0 + x_dot * dt
+    if out is None:
+        return x_0 + x_dot * dt
+    np.multiply(x_dot, dt, out)
+    np.add(x_0, out, out)
+    return out
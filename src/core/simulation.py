@@ -2,47 +2,60 @@ import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib import animation
 import argparse
+import atexit
 import os
+import re
+from contextlib import nullcontext
 from pathlib import Path
 from src.navigation.planning import waypoint_selection, planning
 from src.dynamics.vessel_dynamics import vessel_dynamics
 from src.core.integration import integration
 from src.navigation.obstacle_sim import obstacle_sim
 from src.risk_assessment.cpa_calculations import cpa_calculations
-from src.risk_assessment.cpa_calculations_0speed import cpa_calculations_0speed
 from src.dynamics.controller import controller
 from src.dynamics.actuator_modeling import actuator_modeling
 from src.risk_assessment.risk_calculations import risk_calculations
 from src.navigation.reactive_avoidance import reactive_avoidance
 from src.visualization.animate import animate_step
 from src.utils.imazu_cases import get_obstacles, nautical_to_meters, obstacle_cases, get_obstacle_data
+from src.utils.jit import NUMBA_AVAILABLE
 import matplotlib.ticker as ticker
 # Optional LLM imports
 try:
-    from src.decision_making.multi_llm_decision import COLREGSInterpreter, VesselState
+    from src.decision_making.multi_llm_decision import COLREGSInterpreter, VesselBatch
     LLM_AVAILABLE = True
 except ImportError:
     LLM_AVAILABLE = False
     COLREGSInterpreter = None
-    VesselState = None
-from typing import List, Union, Optional
+    VesselBatch = None
+from typing import Dict, List, Union, Optional
+
+METERS_TO_NMI = 1 / 1852.0
+
+# Interpreters are reused across run_colm calls, keyed by provider name
+_INTERPRETER_CACHE: Dict[str, "COLREGSInterpreter"] = {}
+
+# Whole-word direction keywords; "port" must not match "report" or "important"
+_KDIR_RE = re.compile(r'\b(starboard|port|stand[\s-]*on)\b', re.IGNORECASE)
+_KDIR_VALUES = {'starboard': 1, 'port': -1}
 
 def extract_kdir_from_response(response: str) -> int:
     """
-    Extract K_dir from LLM response
+    Extract K_dir from LLM response.
+    The first direction keyword from the Action field on decides, so sides
+    named in the situation description before it ("port to port") and in
+    the explanation after it are ignored. Without an Action field the
+    first keyword in the whole response decides.
     Returns:
         +1 for "turn starboard"
         -1 for "turn port"
         0 for "stand on" or default
     """
-    response_lower = response.lower()
-    
-    if "turn starboard" in response_lower or "alter course to starboard" in response_lower or "starboard" in response_lower:
-        return 1
-    elif "turn port" in response_lower or "alter course to port" in response_lower or "port" in response_lower:
-        return -1
-    else:  # "stand on" or any other action
+    action = response.lower().find('action:')
+    match = _KDIR_RE.search(response, max(action, 0))
+    if match is None:
         return 0
+    return _KDIR_VALUES.get(match.group(1).lower(), 0)
 
 def run_colm(risk: Union[float, List[float], np.ndarray],
             distance: Union[float, List[float], np.ndarray],
@@ -50,7 +63,8 @@ def run_colm(risk: Union[float, List[float], np.ndarray],
             dcpa: Union[float, List[float], np.ndarray],
             tcpa: Union[float, List[float], np.ndarray],
             time_idx: int = 0,
-            provider: str = None) -> str:
+            provider: str = None,
+            case_id: Optional[int] = None) -> str:
     """
     Run COLM decision making for any number of vessels.
     
@@ -59,8 +73,10 @@ def run_colm(risk: Union[float, List[float], np.ndarray],
         distance: Distance(s) to vessel(s) in nautical miles
         bearing: Relative bearing(s) to vessel(s) in degrees
         dcpa: Distance at Closest Point of Approach in nautical miles
-        tcpa: Time to Closest Point of Approach in minutes
+        tcpa: Time to Closest Point of Approach in seconds
         time_idx: Current time index (default: 0)
+        provider: LLM provider name; one interpreter is created per provider and reused
+        case_id: Scenario number recorded with the decision in the LLM checkpoint
     
     Returns:
         str: COLREGs decision with explanation
@@ -68,24 +84,49 @@ def run_colm(risk: Union[float, List[float], np.ndarray],
     if not LLM_AVAILABLE:
         return "LLM not available - using default behavior"
     
-    # Convert inputs to numpy arrays if they aren't already
-    risk = np.atleast_1d(risk)
-    distance = np.atleast_1d(distance)
-    bearing = np.atleast_1d(bearing)
-    dcpa = np.atleast_1d(dcpa)
-    tcpa = np.atleast_1d(tcpa)
+    # Convert inputs to 1-D float arrays (no copy for rows of the simulation arrays)
+    risk = np.asarray(risk, dtype=np.float64).reshape(-1)
+    distance = np.asarray(distance, dtype=np.float64).reshape(-1)
+    bearing = np.asarray(bearing, dtype=np.float64).reshape(-1)
+    dcpa = np.asarray(dcpa, dtype=np.float64).reshape(-1)
+    tcpa = np.asarray(tcpa, dtype=np.float64).reshape(-1)
     
-    # Create interpreter instance with specified provider
-    interpreter = COLREGSInterpreter(provider=provider)
+    # Reuse the interpreter (and its LLM client) for this provider; it is shared by
+    # concurrent runs and closed (cache and checkpoint flushed) at interpreter exit
+    key = provider or ''
+    interpreter = _INTERPRETER_CACHE.get(key)
+    if interpreter is None:
+        interpreter = COLREGSInterpreter(provider=provider)
+        _INTERPRETER_CACHE[key] = interpreter
+        atexit.register(interpreter.close)
     
-    # Create vessel states
-    vessels = [
-        VesselState(float(r), float(d), float(b), float(dc), float(tc))
-        for r, d, b, dc, tc in zip(risk, distance, bearing, dcpa, tcpa)
-    ]
+    # Create vessel states (one VesselBatch record per obstacle)
+    vessels = np.empty(risk.size, dtype=VesselBatch)
+    vessels['risk'] = risk
+    vessels['distance'] = distance
+    vessels['bearing'] = bearing
+    vessels['dcpa'] = dcpa
+    vessels['tcpa'] = tcpa
     
     # Get decision
-    return interpreter.make_decision(vessels, time_idx)
+    return interpreter.make_decision(vessels, time_idx, case_id=case_id)
+
+def warmup_jit_kernels(n_ob: int) -> None:
+    """
+    Compile the Numba kernels with the argument types used by the main loop,
+    so the first simulation step does not pay the compilation cost.
+    """
+    if not NUMBA_AVAILABLE:
+        return
+    
+    row = np.ones(n_ob)
+    state_vec = np.ones(6)
+    cpa_calculations(1.0, 1.0, 0.0, 0.0, row, row, row, row, 1.0)
+    controller(1.0, 0.0, 0.0, 1.0, row, 0.0, 1.0)
+    actuator_modeling(1.0, 20)
+    integration(state_vec, state_vec, 1.0, out=np.empty(6))
+    integration(row, row, 1.0)
+    reactive_avoidance(row, row, 0.0, 0.0, 0.0, 0.0)
 
 def load_env_file():
     """Load environment variables from .env file if it exists."""
@@ -114,7 +155,144 @@ def parse_args():
                        help='Run comparison between LLM and baseline simulation')
     return parser.parse_args()
 
-def run_simulation(args=None, return_data=False):
+def _timestep(i, X, state, buf, params):
+    """
+    Advance the simulation by one step.
+
+    Records the state for step i, then runs path planning, reactive
+    avoidance, control, vessel dynamics, obstacle motion and risk analysis,
+    writing every result into the preallocated arrays of ``buf``.
+
+    Parameters:
+    i (int): Step index
+    X (numpy.array): Vessel state at step i [x, y, psi, r, b, u]
+    state (dict): Loop-carried state (i_wpt, ui_psi1, Xob, Yob) and the X_dot/X_next
+        scratch buffers, updated in place; also receives the obstacle positions
+        in nmi (Xob_nmi, Yob_nmi) used at step i
+    buf (dict): Preallocated per-step arrays
+    params (dict): Constant simulation parameters (rng: noise generator, None for the global RNG)
+
+    Returns:
+    numpy.array: Vessel state at step i + 1
+    """
+    x, y, psi, r, b = buf['x'], buf['y'], buf['psi'], buf['r'], buf['b']
+    x_nmi, y_nmi = buf['x_nmi'], buf['y_nmi']
+    Xobs, Yobs = buf['Xobs'], buf['Yobs']
+    DCPA, TCPA, Vrel = buf['DCPA'], buf['TCPA'], buf['Vrel']
+    Distance_ob = buf['Distance_ob']
+    dt, Ts = params['dt'], params['Ts']
+    Xwpt, Ywpt = params['Xwpt'], params['Ywpt']
+
+    # Record current state
+    t = buf['time'][i]
+    x[i] = X[0]
+    y[i] = X[1]
+    psi[i] = X[2]
+    r[i] = X[3]
+    b[i] = X[4]
+    buf['u'][i] = X[5]
+
+    # Speed command
+    buf['u_p'][i] = 43.3
+
+    # Convert to nautical miles
+    x_nmi[i] = x[i] * METERS_TO_NMI
+    y_nmi[i] = y[i] * METERS_TO_NMI
+    Xob_nmi = state['Xob'] * METERS_TO_NMI
+    Yob_nmi = state['Yob'] * METERS_TO_NMI
+    state['Xob_nmi'], state['Yob_nmi'] = Xob_nmi, Yob_nmi
+
+    # Path planning and collision avoidance
+    state['i_wpt'] = waypoint_selection(
+        Xwpt, Ywpt, x_nmi[i], y_nmi[i], state['i_wpt'])
+    buf['psi_wp'][i] = planning(Xwpt, Ywpt, x_nmi[i], y_nmi[i], state['i_wpt'])
+    buf['psi_oa'][i], w_B, w_R, Distance_ob[i, :], buf['Bearing_ob'][i, :] = reactive_avoidance(
+        Xob_nmi, Yob_nmi, x_nmi[i], y_nmi[i], psi[i], t)
+
+    # Overall yaw command with Kdir
+    buf['psi_p'][i] = buf['psi_wp'][i] + buf['Kdir'][i] * buf['psi_oa'][i]
+
+    # Controller and actuator
+    buf['tau_c'][i], buf['v_c'][i], state['ui_psi1'] = controller(
+        buf['psi_p'][i], psi[i], r[i], buf['u_p'][i], b, state['ui_psi1'], Ts)
+    buf['tau_ac'][i] = actuator_modeling(buf['tau_c'][i], params['Sat_amp_s'])
+
+    # System dynamics (into preallocated buffers; X becomes the next step's scratch)
+    inputs = [buf['tau_ac'][i], buf['v_c'][i]]
+    X_dot = vessel_dynamics(X, inputs, out=state['X_dot'], rng=params['rng'])
+    X_new = integration(X, X_dot, dt, out=state['X_next'])
+    state['X_next'] = X
+    buf['V_x'][i] = X_dot[0]
+    buf['V_y'][i] = X_dot[1]
+
+    # Obstacles simulation
+    state['Xob'], state['Yob'], Vxob, Vyob = obstacle_sim(
+        state['Xob'], state['Yob'], params['Vob'], params['psiob'], dt)
+    Xobs[i, :] = state['Xob']
+    Yobs[i, :] = state['Yob']
+    buf['Vxobs'][i, :] = Vxob
+    buf['Vyobs'][i, :] = Vyob
+
+    # Risk analysis (all obstacles at once); ranges in metres from step 0 on,
+    # replacing reactive_avoidance's nmi values
+    Distance_ob[i] = np.hypot(Xobs[i] - x[i], Yobs[i] - y[i])
+    if i >= 1:
+        DCPA[i], TCPA[i], Vrel[i], buf['alpha'][i], buf['psi_Vrel'][i] = cpa_calculations(
+            x[i], y[i], x[i-1], y[i-1], Xobs[i], Yobs[i],
+            Xobs[i-1], Yobs[i-1], Ts
+        )
+
+    buf['Risk'][i] = risk_calculations(
+        DCPA[i], TCPA[i], Distance_ob[i], Vrel[i])
+
+    return X_new
+
+def plot_cpa_risk(time, DCPA, Distance_ob, TCPA, Risk, args):
+    """
+    Plot DCPA, range, TCPA and risk over time for every obstacle and save
+    the figure to ``args.output_dir``.
+
+    Returns:
+    matplotlib.figure.Figure: The 2x2 summary figure
+    """
+    fig, axs = plt.subplots(2, 2)
+    # One call per axis; each column (obstacle) becomes its own line
+    axs[0, 0].plot(time, DCPA * METERS_TO_NMI, linewidth=1.0)
+    axs[0, 1].plot(time, Distance_ob * METERS_TO_NMI, linewidth=1.0)
+    tcpa_lines = axs[1, 0].plot(time, TCPA, linewidth=1.0)
+    axs[1, 1].plot(time, Risk, linewidth=1.0)
+
+    # Configure plots
+    axs[0, 0].set_xlim([0, args.sim_time])
+    axs[0, 0].set_ylabel(r'$DCPA$ (nmi)', fontsize=20)
+    axs[0, 0].tick_params(axis='both', labelsize=15)
+
+    axs[0, 1].set_xlim([0, args.sim_time])
+    axs[0, 1].set_ylim([0, 2000/1852])
+    axs[0, 1].set_ylabel(r'$R$ (nmi)', fontsize=20)
+    axs[0, 1].tick_params(axis='both', labelsize=15)
+    
+
+    axs[1, 0].set_xlim([0, args.sim_time])
+    axs[1, 0].set_xlabel('Time (s)', fontsize=20)
+    axs[1, 0].set_ylabel(r'$TCPA$ (s)', fontsize=20)
+    axs[1, 0].tick_params(axis='both', labelsize=15)
+    axs[1, 0].legend(tcpa_lines, [f'TS{i+1}' for i in range(len(tcpa_lines))])
+
+    axs[1, 1].set_xlim([0, args.sim_time])
+    axs[1, 1].set_ylim([0, 1])
+    axs[1, 1].set_xlabel('Time (s)', fontsize=20)
+    axs[1, 1].set_ylabel(r'$Risk$', fontsize=20)
+    axs[1, 1].tick_params(axis='both', labelsize=15)
+
+    fig.suptitle(f'Case {args.case_number}', fontsize=20)
+    fig.tight_layout()
+    fig.savefig(f'{args.output_dir}/plot_dcpa_tcpa_risk_{args.case_number}.eps', format='eps')
+    fig.savefig(f'{args.output_dir}/plot_dcpa_tcpa_risk_{args.case_number}.png')
+
+    return fig
+
+def run_simulation(args=None, return_data=False, rng=None):
     # Load environment variables from .env file if it exists
     load_env_file()
     
@@ -128,11 +306,11 @@ def run_simulation(args=None, return_data=False):
         return run_comparison_simulation(args)
     
     # Initialize parameters
-    t = 0.0  # initial time
     dt = args.dt  # time step
     Ts = dt  # sampling time
     N = round(args.sim_time / dt)
-    Animation = not args.no_animation
+    # Callers that only want the data (comparison mode) get no GIF or plots
+    Animation = not args.no_animation and not return_data
 
     # Initial conditions
     x_v, y_v, psi_v = 0.0, 0.0, np.radians(0)  # initial position and heading
@@ -143,7 +321,6 @@ def run_simulation(args=None, return_data=False):
     X = X_0.copy()
 
     Sat_amp_s = 20
-    i = 0
 
     # Waypoints
     Xwpt = [0, nautical_to_meters(40)/1852]
@@ -155,13 +332,19 @@ def run_simulation(args=None, return_data=False):
     CPA_own = LOA_own * 2
     
     # Get obstacle data
+    # Contiguous writable copies of the read-only case table columns, matching
+    # the array type the JIT kernels are warmed up with
     Xob, Yob, Vob, psiob = get_obstacle_data(args.case_number)
-    LOA_ob = [80] * len(Xob)
-    BOL_ob = [30] * len(Xob)
-    CPA_ob = [LOA_ob[0] * 1] * len(Xob)
+    Xob = np.array(Xob, dtype=np.float64)
+    Yob = np.array(Yob, dtype=np.float64)
+    Vob = np.array(Vob, dtype=np.float64)
+    psiob = np.array(psiob, dtype=np.float64)
+    LOA_ob = np.full(Xob.size, 80.0)
+    BOL_ob = np.full(Xob.size, 30.0)
+    CPA_ob = LOA_ob.copy()
 
     # Initialize arrays
-    time = []
+    time = np.arange(N) * dt
     Kdir = np.ones(N)  # Initialize Kdir array
     x, y, psi = np.zeros(N), np.zeros(N), np.zeros(N)
     r, b, u = np.zeros(N), np.zeros(N), np.zeros(N)
@@ -170,293 +353,112 @@ def run_simulation(args=None, return_data=False):
     psi_p, psi_wp, psi_oa = np.zeros(N), np.zeros(N), np.zeros(N)
     V_x, V_y = np.zeros(N), np.zeros(N)
     x_nmi, y_nmi = np.zeros(N), np.zeros(N)  # Add nautical mile arrays
-    # i_wpt is already initialized above as 1
     
-    Xobs, Yobs, Vxobs, Vyobs = (np.zeros((N, len(Xob))) for _ in range(4))
+    # Obstacle trajectories share one (4, N, n_ob) block; each channel's rows stay contiguous
+    obs_state = np.zeros((4, N, len(Xob)), dtype=np.float64)
+    Xobs, Yobs, Vxobs, Vyobs = obs_state[0], obs_state[1], obs_state[2], obs_state[3]
     DCPA, TCPA, Vrel, alpha, psi_Vrel = (np.zeros((N, len(Xob))) for i in range(5))
     DCPA[:1], TCPA[:1] = 1000, 1000
-    DCPA2, TCPA2, Vrel2, alpha2, psi_Vrel2 = (np.zeros((N, len(Xob))) for _ in range(5))
     Distance_ob, Bearing_ob, Risk = (np.zeros((N, len(Xob))) for _ in range(3))
 
+    # Containers handed to _timestep
+    buf = {
+        'time': time, 'Kdir': Kdir,
+        'x': x, 'y': y, 'psi': psi, 'r': r, 'b': b, 'u': u,
+        'v_c': v_c, 'u_p': u_p, 'tau_c': tau_c, 'tau_ac': tau_ac,
+        'psi_p': psi_p, 'psi_wp': psi_wp, 'psi_oa': psi_oa,
+        'V_x': V_x, 'V_y': V_y, 'x_nmi': x_nmi, 'y_nmi': y_nmi,
+        'Xobs': Xobs, 'Yobs': Yobs, 'Vxobs': Vxobs, 'Vyobs': Vyobs,
+        'DCPA': DCPA, 'TCPA': TCPA, 'Vrel': Vrel, 'alpha': alpha, 'psi_Vrel': psi_Vrel,
+        'Distance_ob': Distance_ob, 'Bearing_ob': Bearing_ob, 'Risk': Risk,
+    }
+    params = {
+        'dt': dt, 'Ts': Ts, 'Sat_amp_s': Sat_amp_s,
+        'Xwpt': Xwpt, 'Ywpt': Ywpt,
+        'Vob': Vob, 'psiob': psiob, 'rng': rng,
+    }
+    state = {
+        'i_wpt': i_wpt, 'ui_psi1': ui_psi1, 'Xob': Xob, 'Yob': Yob,
+        'X_dot': np.empty(6), 'X_next': np.empty(6),
+    }
+
+    warmup_jit_kernels(len(Xob))
+
+    # Resolve LLM availability once instead of on every step
+    llm_active = args.llm == 1 and LLM_AVAILABLE
+    if args.llm == 1 and not LLM_AVAILABLE:
+        print("Warning: LLM requested but langchain_openai not available. Running without LLM.")
+
     # Prepare for animation if enabled
+    frame_stride = 0
     if Animation:
+        # Vessel dimensions never change, convert them once
+        LOA_own_nmi = LOA_own * METERS_TO_NMI
+        BOL_own_nmi = BOL_own * METERS_TO_NMI
+        LOA_ob_nmi = LOA_ob * METERS_TO_NMI
+        BOL_ob_nmi = BOL_ob * METERS_TO_NMI
+        frame_stride = 100  # animate_step only draws on every 100th step
+
         fig, ax = plt.subplots()
         plt.plot(Xwpt, Ywpt, 'ob', Xwpt, Ywpt, ':b', linewidth=1.0)
         plt.grid(True)
+        # Open the window once; animate_step only redraws the canvas
+        plt.show(block=False)
         writer = animation.PillowWriter(fps=5)
+        saving = writer.saving(fig, f"{args.output_dir}/scenario_animation{args.case_number}.gif", dpi=200)
+    else:
+        saving = nullcontext()
 
     # Main simulation loop
-    if Animation:
-        with writer.saving(fig, f"{args.output_dir}/scenario_animation{args.case_number}.gif", dpi=200):
-            for i in range(len(x)):
-                # Record current state
-                time.append(t)
-                x[i] = X[0]
-                y[i] = X[1]
-                psi[i] = X[2]
-                r[i] = X[3]
-                b[i] = X[4]
-                u[i] = X[5]
-                X_0 = X.copy()
-
-                # Speed command
-                u_p[i] = 43.3
-
-                # Convert to nautical miles
-                METERS_TO_NMI = (1 / 1852)
-                x_nmi = [xi * METERS_TO_NMI for xi in x]
-                y_nmi = [yi * METERS_TO_NMI for yi in y]
-                Xob_nmi = [xo * METERS_TO_NMI for xo in Xob]
-                Yob_nmi = [yo * METERS_TO_NMI for yo in Yob]
-                LOA_own_nmi = LOA_own * METERS_TO_NMI
-                BOL_own_nmi = BOL_own * METERS_TO_NMI
-                LOA_ob_nmi = [loa * METERS_TO_NMI for loa in LOA_ob]
-                BOL_ob_nmi = [bol * METERS_TO_NMI for bol in BOL_ob]
-
-                # Path planning and collision avoidance
-                i_wpt = waypoint_selection(Xwpt, Ywpt, x_nmi[i], y_nmi[i], i_wpt)
-                psi_wp[i] = planning(Xwpt, Ywpt, x_nmi[i], y_nmi[i], i_wpt)
-                psi_oa[i], w_B, w_R, Distance_ob[i, :], Bearing_ob[i, :] = reactive_avoidance(
-                    Xob_nmi, Yob_nmi, x_nmi[i], y_nmi[i], psi[i], t)
-                
-
-
-                # extract_kdir_from_response function moved to global scope
+    with saving:
+        for i in range(N):
+            X = _timestep(i, X, state, buf, params)
+
+            if llm_active and i % 200 == 0:
+                # run_colm takes ranges in nmi and bearings in degrees
+                decision = run_colm(
+                    Risk[i],
+                    Distance_ob[i] * METERS_TO_NMI,
+                    np.degrees(Bearing_ob[i]),
+                    DCPA[i] * METERS_TO_NMI,
+                    TCPA[i],
+                    time_idx=i,
+                    provider=args.llm_provider,
+                    case_id=args.case_number
+                )
+                print(f"\nStep {i}: COLM Decision:")
+                print(decision)
+                print(f"Risk: {Risk[i]}")
                 
+                new_kdir = extract_kdir_from_response(decision)
+                Kdir[i] = new_kdir
 
-                # Run COLM decision making (function moved to global scope)
-
-                # Overall yaw command with Kdir
-                psi_p[i] = psi_wp[i] + Kdir[i] * psi_oa[i]
-
-                # Controller and actuator
-                tau_c[i], v_c[i], ui_psi1 = controller(
-                    psi_p[i], psi[i], r[i], u_p[i], b, ui_psi1, Ts)
-                tau_ac[i] = actuator_modeling(tau_c[i], Sat_amp_s)
-                
-                # System dynamics
-                inputs = [tau_ac[i], v_c[i]]
-                X_dot = vessel_dynamics(X_0, inputs)
-                X = integration(X_0, X_dot, dt)
-                V_x[i] = X_dot[0]
-                V_y[i] = X_dot[1]
-
-                # Obstacles simulation
-                Xob, Yob, Vxob, Vyob = obstacle_sim(Xob, Yob, Vob, psiob, dt)
-                Xobs[i, :] = Xob
-                Yobs[i, :] = Yob
-                Vxobs[i, :] = Vxob
-                Vyobs[i, :] = Vyob
-
-                # Risk analysis
-                for j in range(len(Xob)):
-                    if i >= 1:
-                        Distance_ob[i, j] = np.sqrt(
-                            (np.array(Xobs[i, j]) - x[i])**2 + 
-                            (np.array(Yobs[i, j]) - y[i])**2)
-                        
-                        DCPA[i, j], TCPA[i, j], Vrel[i, j], alpha[i, j], psi_Vrel[i, j] = cpa_calculations(
-                            x[i], y[i], x[i-1], y[i-1], Xobs[i, j], Yobs[i, j], 
-                            Xobs[i-1, j], Yobs[i-1, j], Ts
-                        )
-
-                        DCPA2[i, j], TCPA2[i, j], Vrel2[i, j], alpha2[i, j], psi_Vrel2[i, j] = cpa_calculations_0speed(
-                            x[i], y[i], Xobs[i, j], Yobs[i, j], V_x[i], V_y[i], 
-                            Vxobs[i, j], Vyobs[i, j], Distance_ob[i, j]
-                        )
-
-                    Risk[i, j] = risk_calculations(
-                        DCPA[i, j], TCPA[i, j], Distance_ob[i, j], Vrel[i, j])
-
-                if args.llm == 1:
-                    if not LLM_AVAILABLE:
-                        if i == 0:  # Print warning only once
-                            print("Warning: LLM requested but langchain_openai not available. Running without LLM.")
-                    else:
-                        if i % 200 == 0:
-                            decision = run_colm(
-                                Risk[i, :],
-                                Distance_ob[i, :],
-                                Bearing_ob[i, :],
-                                DCPA[i, :],
-                                TCPA[i, :],
-                                provider=args.llm_provider
-                            )
-                            print(f"\nStep {i}: COLM Decision:")
-                            print(decision)
-                            print(f"Risk: {Risk[i, :]}")
-                            
-                            new_kdir = extract_kdir_from_response(decision)
-                            Kdir[i] = new_kdir
-                            #print(f"Extracted Kdir value: {new_kdir}")
-                        elif i > 0:
-                            pass
-                            #Kdir[i] = Kdir[i-1]  # Maintain previous value between updates
-                        
-               
-
-                # Animation
+            # Animation (skip the call on steps where nothing is drawn)
+            if frame_stride and i % frame_stride == 0:
                 l = len(Risk[i, :])
                 animate_step(
                     x_nmi[i], y_nmi[i], psi[i],
                     LOA_own_nmi, BOL_own_nmi, CPA_own,
-                    Xob_nmi, Yob_nmi, psiob,
+                    state['Xob_nmi'], state['Yob_nmi'], psiob,
                     LOA_ob_nmi, BOL_ob_nmi, CPA_ob,
                     Risk[i, :], Vob, i, l
                 )
-                
-                if i % 101 == 0 and i != 0:
-                    writer.grab_frame()
-
-                t += dt
+            
+            if Animation and i % 101 == 0 and i != 0:
+                writer.grab_frame()
 
+        if Animation:
             # Save animation plots
             plt.title(f'Case {args.case_number}', fontsize=25)
             plt.savefig(f'{args.output_dir}/simulation_result{args.case_number}.eps', format='eps')
             plt.savefig(f'{args.output_dir}/simulation_result{args.case_number}.png')
             plt.show(block=True)
-    else:
-        # Run simulation without animation
-        for i in range(len(x)):
-            # Record current state
-            time.append(t)
-            x[i] = X[0]
-            y[i] = X[1]
-            psi[i] = X[2]
-            r[i] = X[3]
-            b[i] = X[4]
-            u[i] = X[5]
-
-            # Convert to nautical miles
-            x_nmi[i] = x[i] / 1852
-            y_nmi[i] = y[i] / 1852
-
-            # Speed command
-            u_p[i] = 43.3
-
-            # Convert to nautical miles
-            METERS_TO_NMI = (1 / 1852)
-            x_nmi = [xi * METERS_TO_NMI for xi in x]
-            y_nmi = [yi * METERS_TO_NMI for yi in y]
-            Xob_nmi = [xo * METERS_TO_NMI for xo in Xob]
-            Yob_nmi = [yo * METERS_TO_NMI for yo in Yob]
-            LOA_own_nmi = LOA_own * METERS_TO_NMI
-            BOL_own_nmi = BOL_own * METERS_TO_NMI
-            LOA_ob_nmi = [loa * METERS_TO_NMI for loa in LOA_ob]
-            BOL_ob_nmi = [bol * METERS_TO_NMI for bol in BOL_ob]
-
-            # Path planning and collision avoidance
-            i_wpt = waypoint_selection(Xwpt, Ywpt, x_nmi[i], y_nmi[i], i_wpt)
-            psi_wp[i] = planning(Xwpt, Ywpt, x_nmi[i], y_nmi[i], i_wpt)
-            psi_oa[i], w_B, w_R, Distance_ob[i, :], Bearing_ob[i, :] = reactive_avoidance(
-                Xob_nmi, Yob_nmi, x_nmi[i], y_nmi[i], psi[i], t)
-
-            # Overall yaw command with Kdir
-            psi_p[i] = psi_wp[i] + Kdir[i] * psi_oa[i]
-
-            # Controller and actuator
-            tau_c[i], v_c[i], ui_psi1 = controller(
-                psi_p[i], psi[i], r[i], u_p[i], b, ui_psi1, Ts)
-            tau_ac[i] = actuator_modeling(tau_c[i], Sat_amp_s)
-
-            # Store current state
-            X_0 = X.copy()
-            
-            # System dynamics
-            inputs = [tau_ac[i], v_c[i]]
-            X_dot = vessel_dynamics(X_0, inputs)
-            X = integration(X_0, X_dot, dt)
-            V_x[i] = X_dot[0]
-            V_y[i] = X_dot[1]
-
-            # Obstacles simulation
-            Xob, Yob, Vxob, Vyob = obstacle_sim(Xob, Yob, Vob, psiob, dt)
-            Xobs[i, :] = Xob
-            Yobs[i, :] = Yob
-            Vxobs[i, :] = Vxob
-            Vyobs[i, :] = Vyob
-
-            # Risk analysis
-            for j in range(len(Xob)):
-                if i >= 1:
-                    Distance_ob[i, j] = np.sqrt(
-                        (np.array(Xobs[i, j]) - x[i])**2 + 
-                        (np.array(Yobs[i, j]) - y[i])**2)
-                    
-                    DCPA[i, j], TCPA[i, j], Vrel[i, j], alpha[i, j], psi_Vrel[i, j] = cpa_calculations(
-                        x[i], y[i], x[i-1], y[i-1], Xobs[i, j], Yobs[i, j], 
-                        Xobs[i-1, j], Yobs[i-1, j], Ts
-                    )
-
-                    DCPA2[i, j], TCPA2[i, j], Vrel2[i, j], alpha2[i, j], psi_Vrel2[i, j] = cpa_calculations_0speed(
-                        x[i], y[i], Xobs[i, j], Yobs[i, j], V_x[i], V_y[i], 
-                        Vxobs[i, j], Vyobs[i, j], Distance_ob[i, j]
-                    )
-
-                    Risk[i, j] = risk_calculations(
-                        DCPA[i, j], TCPA[i, j], Distance_ob[i, j], Vrel[i, j])
-
-            if args.llm == 1:
-                if not LLM_AVAILABLE:
-                    if i == 0:  # Print warning only once
-                        print("Warning: LLM requested but langchain_openai not available. Running without LLM.")
-                else:
-                    if i % 200 == 0:
-                        decision = run_colm(
-                            Risk[i, :],
-                            Distance_ob[i, :],
-                            Bearing_ob[i, :],
-                            DCPA[i, :],
-                            TCPA[i, :],
-                            provider=args.llm_provider
-                        )
-                     
-                        print(decision)
-                        
-                        new_kdir = extract_kdir_from_response(decision)
-                        Kdir[i] = new_kdir
-                    elif i > 0:
-                        pass
-
-            t += dt
 
     #print(Kdir)
     # Plot DCPA, TCPA, Risk plots
-    fig, axs = plt.subplots(2, 2)
-    for i in range(len(Xob)):
-        axs[0, 0].plot(time, DCPA[:, i] / 1852, linewidth=1.0)
-        axs[0, 1].plot(time, Distance_ob[:, i]/1852, linewidth=1.0)
-        axs[1, 0].plot(time, TCPA[:, i], linewidth=1.0, label=f'TS{i+1}')
-        axs[1, 1].plot(time, Risk[:, i], linewidth=1.0)
-
-    # Configure plots
-    axs[0, 0].set_xlim([0, args.sim_time])
-    axs[0, 0].set_ylabel(r'$DCPA$ (nmi)', fontsize=20)
-    axs[0, 0].tick_params(axis='both', labelsize=15)
-
-    axs[0, 1].set_xlim([0, args.sim_time])
-    axs[0, 1].set_ylim([0, 2000/1852])
-    axs[0, 1].set_ylabel(r'$R$ (nmi)', fontsize=20)
-    axs[0, 1].tick_params(axis='both', labelsize=15)
-    
-
-    axs[1, 0].set_xlim([0, args.sim_time])
-    axs[1, 0].set_xlabel('Time (s)', fontsize=20)
-    axs[1, 0].set_ylabel(r'$TCPA$ (s)', fontsize=20)
-    axs[1, 0].tick_params(axis='both', labelsize=15)
-    axs[1, 0].legend()
-
-    axs[1, 1].set_xlim([0, args.sim_time])
-    axs[1, 1].set_ylim([0, 1])
-    axs[1, 1].set_xlabel('Time (s)', fontsize=20)
-    axs[1, 1].set_ylabel(r'$Risk$', fontsize=20)
-    axs[1, 1].tick_params(axis='both', labelsize=15)
-
-    fig.suptitle(f'Case {args.case_number}', fontsize=20)
-    plt.tight_layout()
-    plt.savefig(f'{args.output_dir}/plot_dcpa_tcpa_risk_{args.case_number}.eps', format='eps')
-    plt.savefig(f'{args.output_dir}/plot_dcpa_tcpa_risk_{args.case_number}.png')
-    plt.show()
+    if not return_data:
+        plot_cpa_risk(time, DCPA, Distance_ob, TCPA, Risk, args)
+        plt.show()
 
     # Return data if requested (for comparison mode)
     if return_data:
@@ -464,15 +466,7 @@ def run_simulation(args=None, return_data=False):
         # Kdir = 0 when Kdir[i] * psi_oa[i] == 0 (no turn)
         # Kdir = +1 when Kdir[i] * psi_oa[i] > 0 (starboard)
         # Kdir = -1 when Kdir[i] * psi_oa[i] < 0 (port)
-        comparison_kdir = np.zeros(len(Kdir))
-        for i in range(len(Kdir)):
-            control_value = Kdir[i] * psi_oa[i]
-            if control_value > 0:
-                comparison_kdir[i] = 1  # Starboard
-            elif control_value < 0:
-                comparison_kdir[i] = -1  # Port
-            else:
-                comparison_kdir[i] = 0  # No turn
+        comparison_kdir = np.sign(Kdir * psi_oa).astype(np.int8)
         
         return {
             'time': time,
@@ -5,63 +5,64 @@ def decision_making(x, y, psi, x_ob, y_ob, psi_ob, v_rel, u, risk):
     """
     Make collision avoidance decisions based on COLREG rules.
 
+    Every obstacle is classified at once; the returned scalar decision is the
+    one for the obstacle with the highest risk.
+
     Parameters:
     x, y (float): Position of the vessel
     psi (float): Heading angle of the vessel
     x_ob, y_ob (array-like): Positions of the obstacles
     psi_ob (array-like): Heading angles of the obstacles
-    v_rel (float): Relative velocity
+    v_rel (float or array-like): Relative velocity
     u (float): Speed of the vessel
     risk (array-like): Risk levels for each obstacle
 
     Returns:
-    tuple: (colreg_no, heading_dir, speed_level, relative_bearing_ob)
-        colreg_no (int): COLREG rule number
-        heading_dir (int): Heading direction (-1: port, 0: maintain, 1: starboard)
+    tuple: (colreg_no, heading_dir, speed_level, relative_bearing_ob, colreg_ob, heading_dir_ob)
+        colreg_no (float): COLREG rule number for the highest-risk obstacle
+        heading_dir (int): Heading direction for the highest-risk obstacle
+            (-1: port, 0: maintain, 1: starboard)
         speed_level (int): Speed level
-        relative_bearing_ob (array): Relative bearings to obstacles
+        relative_bearing_ob (array): Relative bearings to obstacles, wrapped to [-pi, pi)
+        colreg_ob (array): COLREG rule number for each obstacle
+        heading_dir_ob (array): Heading direction for each obstacle
     """
 
     colreg_no = 0
     heading_dir = 1  # 0: Head-on, 1: move to starboard, -1: move to port
     speed_level = 0
 
-    distance_ob = np.sqrt((np.array(x_ob) - x)**2 + (np.array(y_ob) - y)**2)
-    los_ob = np.arctan2((np.array(y_ob) - y), (np.array(x_ob) - x))
+    x_ob = np.asarray(x_ob, dtype=np.float64)
+    y_ob = np.asarray(y_ob, dtype=np.float64)
 
-    relative_bearing_ob = psi - los_ob
+    distance_ob = np.hypot(x_ob - x, y_ob - y)
+    los_ob = np.arctan2(y_ob - y, x_ob - x)
 
-    for i in range(len(x_ob)):
-        if abs(relative_bearing_ob[i]) <= 6 * np.pi / 180:
-            # Head-on (overtake/move to starboard)
-            if v_rel >= u:
-                # Head-on move to starboard
-                colreg_no = 14
-                heading_dir = 1
-            else:
-                # Head-on Overtake
-                colreg_no = 13
-                heading_dir = 1  # or -1 based on the risk
+    relative_bearing_ob = np.mod(psi - los_ob + np.pi, 2 * np.pi) - np.pi
 
-        elif 6 * np.pi / 180 < relative_bearing_ob[i] <= 112 * np.pi / 180:
-            # Crossing - Give way
-            colreg_no = 15.1
-            heading_dir = 1
+    # Encounter masks
+    head_on = np.abs(relative_bearing_ob) <= np.radians(6)
+    give_way = (np.radians(6) < relative_bearing_ob) & (relative_bearing_ob <= np.radians(112))
+    stand_on = (-np.radians(118) <= relative_bearing_ob) & (relative_bearing_ob < -np.radians(6))
+    overtaking = (np.radians(112) < relative_bearing_ob) | (relative_bearing_ob < -np.radians(118))
+    faster = np.asarray(v_rel) >= u
 
-        elif -118 * np.pi / 180 <= relative_bearing_ob[i] < -6 * np.pi / 180:
-            # Crossing - Stand on
-            colreg_no = 15.2
-            heading_dir = 0
+    colreg_ob = np.select(
+        [head_on & faster,  # Head-on move to starboard
+         head_on,           # Head-on Overtake
+         give_way,          # Crossing - Give way
+         stand_on,          # Crossing - Stand on
+         overtaking],       # Overtaking - Stand on
+        [14, 13, 15.1, 15.2, 13],
+        default=colreg_no)
+    heading_dir_ob = np.select(
+        [head_on, give_way, stand_on, overtaking],
+        [1, 1, 0, 0],
+        default=heading_dir)
 
-        elif 112 * np.pi / 180 < relative_bearing_ob[i] or relative_bearing_ob[i] < -118 * np.pi / 180:
-            # Overtaking - Stand on
-            if v_rel >= u:
-                # Head-on move to starboard
-                colreg_no = 13
-                heading_dir = 0
-            else:
-                # Head-on Overtake
-                colreg_no = 13
-                heading_dir = 0  # or -1 based on the risk
+    if colreg_ob.size > 0:
+        worst = int(np.argmax(risk))
+        colreg_no = float(colreg_ob[worst])
+        heading_dir = int(heading_dir_ob[worst])
 
-    return colreg_no, heading_dir, speed_level, relative_bearing_ob
+    return colreg_no, heading_dir, speed_level, relative_bearing_ob, colreg_ob, heading_dir_ob
@@ -1,9 +1,17 @@
 import os
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import shelve
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import List, Optional, Tuple, Dict, Union
 from enum import Enum
 import numpy as np
 from abc import ABC, abstractmethod
+from src.utils.validation import ResponseValidator
 
 # Import LLM clients
 try:
@@ -19,6 +27,26 @@ try:
 except ImportError:
     ANTHROPIC_AVAILABLE = False
 
+# HTTP client library for the providers' connection pools (a dependency of both SDKs)
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+# Semantic cache: scale of one "unit" of difference per feature of the highest risk vessel
+# (risk, distance nmi, DCPA nmi, TCPA s); bearings are compared on the unit circle, 5 deg = 1 unit
+_SEMANTIC_SCALES = np.array([0.05, 0.1, 0.05, 30.0])
+_SEMANTIC_BEARING_SCALE = np.deg2rad(5.0)
+
+# Connection pool size of the LLM providers' HTTP clients
+HTTP_POOL_SIZE = 32
+
+
+def _http_limits() -> "httpx.Limits":
+    """Keep-alive pool limits for the LLM providers' HTTP clients"""
+    return httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE)
+
 @dataclass
 class VesselState:
     """Represents the state of a vessel encounter"""
@@ -29,6 +57,37 @@ class VesselState:
     tcpa: float
 
 
+# Structured (one record per vessel) layout of VesselState used for batches of vessels
+VesselBatch = np.dtype([
+    ('risk', 'f8'),
+    ('distance', 'f8'),
+    ('bearing', 'f8'),
+    ('dcpa', 'f8'),
+    ('tcpa', 'f8'),
+])
+
+VesselsLike = Union[List[VesselState], np.ndarray]
+
+
+def as_vessel_batch(vessels: VesselsLike) -> np.ndarray:
+    """Convert a list of VesselState (or a VesselBatch array) to a VesselBatch array"""
+    if isinstance(vessels, np.ndarray) and vessels.dtype == VesselBatch:
+        return vessels
+    return np.fromiter(
+        ((v.risk, v.distance, v.bearing, v.dcpa, v.tcpa) for v in vessels),
+        dtype=VesselBatch, count=len(vessels)
+    )
+
+
+@dataclass
+class _Situation:
+    """A situation that needs an LLM answer, with its cache and checkpoint keys"""
+    vessels: np.ndarray
+    key: tuple
+    description: str
+    prompt_hash: str
+
+
 class RiskLevel(Enum):
     """Risk level classification"""
     LOW = "low"
@@ -40,111 +99,280 @@ class LLMProvider(ABC):
     """Abstract base class for LLM providers"""
     
     @abstractmethod
-    def generate_response(self, prompt: str) -> str:
-        """Generate response from the LLM"""
+    def generate_response(self, prompt: str, system: Optional[str] = None) -> str:
+        """Generate response from the LLM; system is the preamble shared by every request"""
         pass
     
     @abstractmethod
     def is_available(self) -> bool:
         """Check if the LLM provider is available"""
         pass
+    
+    async def agenerate_response(self, prompt: str, system: Optional[str] = None) -> str:
+        """Generate response without blocking the event loop (default: run the sync call in a thread)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: self.generate_response(prompt, system))
+    
+    async def aclose(self) -> None:
+        """Close the clients used by agenerate_response (default: nothing to close)"""
 
 class OpenAIProvider(LLMProvider):
     """OpenAI LLM provider implementation"""
     
+    # ChatOpenAI clients (and their connection pools) shared by providers with the same settings
+    _shared_clients: Dict[Tuple[str, float, int], "ChatOpenAI"] = {}
+    _shared_lock = threading.Lock()
+    
     def __init__(self, model: str = "gpt-4", temperature: float = 0.1, max_tokens: int = 500):
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
         self.client = None
+        # Async client with its own connection pool, bound to the event loop it is first used on
+        self._async_client = None
+        self._async_http = None
         
         if OPENAI_AVAILABLE and self.is_available():
-            self.client = ChatOpenAI(
-                model=model,
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
+            self.client = self._shared_client(model, temperature, max_tokens)
+    
+    @classmethod
+    def _shared_client(cls, model: str, temperature: float, max_tokens: int) -> "ChatOpenAI":
+        """Get the shared ChatOpenAI client for these settings, creating it on first use"""
+        key = (model, temperature, max_tokens)
+        with cls._shared_lock:
+            client = cls._shared_clients.get(key)
+            if client is None:
+                client = ChatOpenAI(
+                    model=model,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
+                cls._shared_clients[key] = client
+        return client
     
     def is_available(self) -> bool:
         """Check if OpenAI is available"""
-        return OPENAI_AVAILABLE and os.getenv("OPENAI_API_KEY") is not None
+        return OPENAI_AVAILABLE and HTTPX_AVAILABLE and os.getenv("OPENAI_API_KEY") is not None
+    
+    @staticmethod
+    def _messages(prompt: str, system: Optional[str]) -> list:
+        """Chat messages with the preamble as a leading system message. OpenAI only caches
+        prompts of 1024+ tokens, so the current ~70-token preamble is not cached."""
+        if system is None:
+            return [("human", prompt)]
+        return [("system", system), ("human", prompt)]
     
-    def generate_response(self, prompt: str) -> str:
+    def generate_response(self, prompt: str, system: Optional[str] = None) -> str:
         """Generate response using OpenAI"""
         if not self.client:
             return "OpenAI not available"
         
         try:
-            response = self.client.invoke(prompt)
+            response = self.client.invoke(self._messages(prompt, system))
             return response.content
         except Exception as e:
             return f"OpenAI error: {str(e)}"
+    
+    async def agenerate_response(self, prompt: str, system: Optional[str] = None) -> str:
+        """Generate response using OpenAI's async API"""
+        if not self.client:
+            return "OpenAI not available"
+        
+        if self._async_client is None:
+            self._async_http = httpx.AsyncClient(limits=_http_limits())
+            self._async_client = ChatOpenAI(
+                model=self.model,
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+                http_async_client=self._async_http
+            )
+        
+        try:
+            response = await self._async_client.ainvoke(self._messages(prompt, system))
+            return response.content
+        except Exception as e:
+            return f"OpenAI error: {str(e)}"
+    
+    async def aclose(self) -> None:
+        """Close the async client's connection pool"""
+        if self._async_http is not None:
+            await self._async_http.aclose()
+            self._async_client = None
+            self._async_http = None
 
 class ClaudeProvider(LLMProvider):
     """Claude/Anthropic LLM provider implementation"""
     
+    # Anthropic client (model settings are passed per request) shared by all providers
+    _shared_client = None
+    _shared_lock = threading.Lock()
+    
     def __init__(self, model: str = "claude-sonnet-4-20250514", temperature: float = 0.1, max_tokens: int = 500):
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
         self.client = None
+        # Async client with its own connection pool, bound to the event loop it is first used on
+        self._async_client = None
+        self._async_http = None
         
         if ANTHROPIC_AVAILABLE and self.is_available():
-            self.client = anthropic.Anthropic(
-                api_key=os.getenv("CLAUDE_API_KEY")
-            )
+            self.client = self._get_shared_client()
+    
+    @classmethod
+    def _get_shared_client(cls) -> "anthropic.Anthropic":
+        """Get the shared Anthropic client, creating it on first use"""
+        with cls._shared_lock:
+            if cls._shared_client is None:
+                cls._shared_client = anthropic.Anthropic(
+                    api_key=os.getenv("CLAUDE_API_KEY"),
+                    http_client=httpx.Client(limits=_http_limits())
+                )
+        return cls._shared_client
     
     def is_available(self) -> bool:
         """Check if Claude is available"""
-        return ANTHROPIC_AVAILABLE and os.getenv("CLAUDE_API_KEY") is not None
+        return ANTHROPIC_AVAILABLE and HTTPX_AVAILABLE and os.getenv("CLAUDE_API_KEY") is not None
+    
+    def _request(self, prompt: str, system: Optional[str]) -> dict:
+        """
+        Message request arguments; the preamble is sent as a system block marked for prompt
+        caching. Anthropic ignores the marker below its minimum cacheable length (1024 tokens
+        for Sonnet), so the current ~70-token preamble is not cached; it takes effect if the
+        preamble grows past that.
+        """
+        request = dict(
+            model=self.model,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            messages=[
+                {"role": "user", "content": prompt}
+            ]
+        )
+        if system is not None:
+            request["system"] = [
+                {"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}
+            ]
+        return request
     
-    def generate_response(self, prompt: str) -> str:
+    def generate_response(self, prompt: str, system: Optional[str] = None) -> str:
         """Generate response using Claude"""
         if not self.client:
             return "Claude not available"
         
         try:
-            response = self.client.messages.create(
-                model=self.model,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
+            response = self.client.messages.create(**self._request(prompt, system))
+            return response.content[0].text
+        except Exception as e:
+            return f"Claude error: {str(e)}"
+    
+    async def agenerate_response(self, prompt: str, system: Optional[str] = None) -> str:
+        """Generate response using Claude's async API"""
+        if not self.client:
+            return "Claude not available"
+        
+        if self._async_client is None:
+            self._async_http = httpx.AsyncClient(limits=_http_limits())
+            self._async_client = anthropic.AsyncAnthropic(
+                api_key=os.getenv("CLAUDE_API_KEY"),
+                http_client=self._async_http
             )
+        
+        try:
+            response = await self._async_client.messages.create(**self._request(prompt, system))
             return response.content[0].text
         except Exception as e:
             return f"Claude error: {str(e)}"
+    
+    async def aclose(self) -> None:
+        """Close the async client's connection pool"""
+        if self._async_http is not None:
+            await self._async_http.aclose()
+            self._async_client = None
+            self._async_http = None
+
+def _is_error_response(response: str) -> bool:
+    """Whether a provider response is an error/unavailable message rather than a decision"""
+    return (response.endswith("not available") or
+            response.startswith(("OpenAI error:", "Claude error:", "No LLM provider")))
+
 
 class MultiLLMCOLREGSInterpreter:
     """COLREGs interpreter that can use multiple LLM providers"""
     
-    def __init__(self, provider: str = None):
+    def __init__(self, provider: str = None, concurrency_limit: int = 8,
+                 cache_size: int = 4096, semantic_radius: Optional[float] = None,
+                 cache_path: Optional[str] = None, race_providers: bool = False,
+                 race_timeout: float = 5.0, output_jsonl: Optional[str] = None,
+                 fsync_every: int = 32):
         self.provider_name = provider or os.getenv("LLM_PROVIDER", "openai")
         self.provider = self._initialize_provider()
+        self.concurrency_limit = concurrency_limit  # Max in-flight requests for batch decisions
+        
+        # Send each request to all configured providers and keep the first valid answer
+        self.race_providers = race_providers
+        self.race_timeout = race_timeout  # Seconds allowed per provider in a race
+        self._race_pool: Optional[List[Tuple[str, LLMProvider]]] = None
+        
+        # Event loop owned by the interpreter, run in a background thread from first use until
+        # close(); all async LLM calls run on it, so the providers' async clients stay bound to one loop
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
+        
+        # Response caches: exact (quantized situation key) and optional semantic, which reuses the
+        # nearest cached situation with the same vessel count within semantic_radius scaled units
+        self.cache_size = cache_size
+        self.semantic_radius = semantic_radius
+        self._cache: "OrderedDict[tuple, str]" = OrderedDict()
+        self._semantic_vecs = np.zeros((cache_size, 6))
+        self._semantic_counts = np.full(cache_size, -1)
+        self._semantic_responses: List[Optional[str]] = [None] * cache_size
+        self._semantic_count = 0
+        self._cache_lock = threading.Lock()
+        cache_path = cache_path or os.getenv("LLM_CACHE_PATH")
+        self._store = shelve.open(cache_path) if cache_path else None
+        
+        # JSONL checkpoint of completed decisions, so an interrupted sweep resumes without new LLM calls
+        self.case_id: Optional[int] = None  # Recorded with decisions made without a case_id argument
+        self.fsync_every = fsync_every
+        self._done: Dict[str, str] = {}
+        self._fp = None
+        self._unsynced = 0
+        self._checkpoint_lock = threading.Lock()
+        output_jsonl = output_jsonl or os.getenv("LLM_CHECKPOINT_PATH")
+        if output_jsonl:
+            self._load_checkpoint(output_jsonl)
+            self._fp = open(output_jsonl, "a", encoding="utf-8")
         
         self.system_prompt = """You are a ship navigation officer. Make COLREGs-compliant decisions with your response in this format Rule {} (situation description), Action: [Stand on, no action / Give-way, turn to starboard / Give-way, turn to port / Continue current
 maneuver], Explanation: Turn starboard req .."""
     
-    def _initialize_provider(self) -> Optional[LLMProvider]:
-        """Initialize the appropriate LLM provider"""
-        if self.provider_name.lower() == "openai":
+    @staticmethod
+    def _configured_provider(name: str) -> Optional[LLMProvider]:
+        """Create a provider with its settings from the environment, if it is available"""
+        if name == "openai":
             provider = OpenAIProvider(
                 model=os.getenv("OPENAI_MODEL", "gpt-4"),
                 temperature=float(os.getenv("OPENAI_TEMPERATURE", "0.1")),
                 max_tokens=int(os.getenv("OPENAI_MAX_TOKENS", "50"))
             )
-            if provider.is_available():
-                return provider
-        
-        elif self.provider_name.lower() == "claude":
+        elif name == "claude":
             provider = ClaudeProvider(
                 model=os.getenv("CLAUDE_MODEL", "claude-sonnet-4-20250514"),
                 temperature=float(os.getenv("CLAUDE_TEMPERATURE", "0.1")),
                 max_tokens=int(os.getenv("CLAUDE_MAX_TOKENS", "50"))
             )
-            if provider.is_available():
-                return provider
+        else:
+            return None
+        
+        return provider if provider.is_available() else None
+    
+    def _initialize_provider(self) -> Optional[LLMProvider]:
+        """Initialize the appropriate LLM provider"""
+        provider = self._configured_provider(self.provider_name.lower())
+        if provider is not None:
+            return provider
         
         # Fallback: try OpenAI if Claude fails, or vice versa
         if self.provider_name.lower() == "claude":
@@ -162,49 +390,373 @@ maneuver], Explanation: Turn starboard req .."""
     
     
     
-    def _format_situation_description(self, vessels: List[VesselState]) -> str:
-        """Format situation description for LLM"""
-        if not vessels:
+    @staticmethod
+    def _highest_risk_vessel(vessels: np.ndarray) -> np.void:
+        """Record of the highest risk vessel (the first one on ties, like max())"""
+        return vessels[int(vessels['risk'].argmax())]
+    
+    def _format_situation_description(self, vessels: np.ndarray) -> str:
+        """Format situation description for LLM from a VesselBatch array"""
+        if len(vessels) == 0:
             return "No vessels detected."
         
-        
-        highest_risk_vessel = max(vessels, key=lambda v: v.risk)
+        highest_risk_vessel = self._highest_risk_vessel(vessels)
         
         description = f"""
             Maritime Situation Analysis:
             - Number of vessels: {len(vessels)}
             - Highest risk vessel:
-            * Risk Level: {highest_risk_vessel.risk:.2f}
-            * Distance: {highest_risk_vessel.distance:.2f} nautical miles
-            * Bearing: {highest_risk_vessel.bearing:.1f}°
-            * DCPA: {highest_risk_vessel.dcpa:.2f} nautical miles
-            * TCPA: {highest_risk_vessel.tcpa:.1f} seconds
+            * Risk Level: {highest_risk_vessel['risk']:.2f}
+            * Distance: {highest_risk_vessel['distance']:.2f} nautical miles
+            * Bearing: {highest_risk_vessel['bearing']:.1f}°
+            * DCPA: {highest_risk_vessel['dcpa']:.2f} nautical miles
+            * TCPA: {highest_risk_vessel['tcpa']:.1f} seconds
 
             Based on COLREGs rules, what action should be taken?"""
         
         return description.strip()
     
-    def make_decision(self, vessels: List[VesselState], time_idx: int = 0) -> str:
-        """Make a COLREGs-compliant decision"""
+    def _tag_response(self, response: str, provider_name: Optional[str] = None) -> str:
+        """Add provider information to a response"""
+        return f"[{(provider_name or self.provider_name).upper()}] {response}"
+    
+    def _race_candidates(self) -> List[Tuple[str, LLMProvider]]:
+        """Providers taking part in a race, the configured one first"""
+        if self._race_pool is None:
+            names = sorted(["openai", "claude"], key=lambda name: name != self.provider_name.lower())
+            pool = [(name, self._configured_provider(name)) for name in names]
+            self._race_pool = [(name, provider) for name, provider in pool if provider is not None]
+        return self._race_pool
+    
+    async def _arace_providers(self, prompt: str, system: Optional[str] = None) -> Tuple[str, str]:
+        """
+        Send the prompt to every available provider at once and return (provider name, response)
+        of the first valid answer, cancelling the others. Each provider gets race_timeout seconds.
+        """
+        tasks = {
+            asyncio.ensure_future(asyncio.wait_for(
+                provider.agenerate_response(prompt, system), self.race_timeout)): name
+            for name, provider in self._race_candidates()
+        }
+        if not tasks:
+            return self.provider_name, "No LLM provider available"
+        
+        result = (self.provider_name, "No LLM provider answered in time")
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    error = task.exception()
+                    if error is not None:
+                        result = (tasks[task], f"No LLM provider answered: {tasks[task]}: {error!r}")
+                        continue
+                    result = (tasks[task], task.result())
+                    if not _is_error_response(result[1]):
+                        return result
+        finally:
+            for task in pending:
+                task.cancel()
+        return result
+    
+    def _generate(self, description: str) -> Tuple[str, str]:
+        """Get (provider name, response) for a situation from the provider or a provider race"""
+        if self.race_providers:
+            return self._submit(self._arace_providers(description, self.system_prompt)).result()
+        return self.provider_name, self.provider.generate_response(description, system=self.system_prompt)
+    
+    async def _agenerate(self, description: str) -> Tuple[str, str]:
+        """Async version of _generate"""
+        if self.race_providers:
+            return await self._arace_providers(description, self.system_prompt)
+        return self.provider_name, await self.provider.agenerate_response(description, system=self.system_prompt)
+    
+    @classmethod
+    def _cache_key(cls, vessels: np.ndarray) -> tuple:
+        """Quantized key of the situation sent to the LLM (highest risk vessel and vessel count)"""
+        v = cls._highest_risk_vessel(vessels)
+        return (round(float(v['risk']), 2), round(float(v['distance']), 1),
+                round(float(v['bearing']), 0), round(float(v['dcpa']), 2),
+                round(float(v['tcpa']), 0), len(vessels))
+    
+    @staticmethod
+    def _semantic_vector(key: tuple) -> np.ndarray:
+        """Feature vector of a cache key, scaled so a Euclidean distance of 1 is one unit of difference"""
+        risk, distance, bearing, dcpa, tcpa, _ = key
+        b = np.deg2rad(bearing)
+        scaled = np.array([risk, distance, dcpa, tcpa]) / _SEMANTIC_SCALES
+        return np.concatenate((scaled, [np.cos(b), np.sin(b)] / _SEMANTIC_BEARING_SCALE))
+    
+    def _cache_get(self, key: tuple) -> Optional[str]:
+        """Look up a cached response: memory, then disk store, then semantic tier"""
+        with self._cache_lock:
+            response = self._cache.get(key)
+            if response is not None:
+                self._cache.move_to_end(key)
+                return response
+            
+            if self._store is not None:
+                response = self._store.get(f"{self.provider_name}:{key!r}")
+                if response is not None:
+                    self._cache_put_locked(key, response, persist=False)
+                    return response
+            
+            if self.semantic_radius is not None and self._semantic_count:
+                n = min(self._semantic_count, self.cache_size)
+                dist = np.linalg.norm(self._semantic_vecs[:n] - self._semantic_vector(key), axis=1)
+                dist[self._semantic_counts[:n] != key[-1]] = np.inf
+                best = int(np.argmin(dist))
+                if dist[best] <= self.semantic_radius:
+                    return self._semantic_responses[best]
+        return None
+    
+    def _cache_put(self, key: tuple, response: str) -> None:
+        """Store a successful LLM response in the caches"""
+        # Do not cache provider errors
+        if _is_error_response(response):
+            return
+        with self._cache_lock:
+            self._cache_put_locked(key, response, persist=True)
+    
+    def _cache_put_locked(self, key: tuple, response: str, persist: bool) -> None:
+        """Insert into the caches; caller holds the cache lock"""
+        if self.cache_size <= 0:
+            return
+        self._cache[key] = response
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        
+        if self.semantic_radius is not None:
+            slot = self._semantic_count % self.cache_size
+            self._semantic_vecs[slot] = self._semantic_vector(key)
+            self._semantic_counts[slot] = key[-1]
+            self._semantic_responses[slot] = response
+            self._semantic_count += 1
+        
+        if persist and self._store is not None:
+            self._store[f"{self.provider_name}:{key!r}"] = response
+    
+    def _load_checkpoint(self, path: str) -> None:
+        """Load decisions recorded by an earlier run (a truncated last line is ignored)"""
+        if not os.path.exists(path):
+            return
+        line = "\n"
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self._done[record["prompt_hash"]] = record["response"]
+        
+        # Terminate a partially written last line so new records start on their own line
+        if not line.endswith("\n"):
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("\n")
+    
+    def _prompt_hash(self, description: str) -> str:
+        """Checkpoint key of the full prompt for a situation"""
+        prompt = f"{self.system_prompt}\n\n{description}"
+        return hashlib.blake2s(prompt.encode(), digest_size=16).hexdigest()
+    
+    def _checkpoint_put(self, prompt_hash: str, response: str, step: int,
+                        case_id: Optional[int] = None) -> None:
+        """Append a successful decision to the checkpoint file"""
+        if self._fp is None or _is_error_response(response):
+            return
+        if case_id is None:
+            case_id = self.case_id
+        record = {"case_id": case_id, "step": step, "prompt_hash": prompt_hash, "response": response}
+        with self._checkpoint_lock:
+            self._done[prompt_hash] = response
+            self._fp.write(json.dumps(record) + "\n")
+            self._fp.flush()
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every:
+                os.fsync(self._fp.fileno())
+                self._unsynced = 0
+    
+    def _submit(self, coro) -> "concurrent.futures.Future":
+        """Schedule a coroutine on the interpreter's event loop, starting the loop on first use"""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._loop.run_forever, name="llm-event-loop", daemon=True)
+                self._loop_thread.start()
+            return asyncio.run_coroutine_threadsafe(coro, self._loop)
+    
+    async def _aclose_providers(self) -> None:
+        """Close the async clients of the configured and racing providers"""
+        for provider in [self.provider] + [provider for _, provider in self._race_pool or []]:
+            if provider is not None:
+                await provider.aclose()
+    
+    def close(self) -> None:
+        """Close the providers' async clients and the event loop, then flush and close the
+        on-disk response cache and decision checkpoint"""
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+        if loop is not None:
+            asyncio.run_coroutine_threadsafe(self._aclose_providers(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            self._loop_thread.join()
+            loop.close()
+        
+        with self._cache_lock:
+            if self._store is not None:
+                self._store.close()
+                self._store = None
+        with self._checkpoint_lock:
+            if self._fp is not None:
+                self._fp.flush()
+                os.fsync(self._fp.fileno())
+                self._fp.close()
+                self._fp = None
+    
+    def _lookup(self, vessels: np.ndarray) -> Tuple[Optional[str], Optional["_Situation"]]:
+        """
+        Answer a situation from the response caches or the checkpoint.
+        Returns (response, None) on a hit, otherwise (None, situation) to send to the LLM.
+        """
+        key = self._cache_key(vessels)
+        response = self._cache_get(key)
+        if response is not None:
+            return response, None
+        
+        description = self._format_situation_description(vessels)
+        prompt_hash = self._prompt_hash(description)
+        response = self._done.get(prompt_hash)
+        if response is not None:
+            self._cache_put(key, response)
+            return response, None
+        
+        return None, _Situation(vessels, key, description, prompt_hash)
+    
+    def _record(self, situation: "_Situation", response: str, step: int,
+                case_id: Optional[int] = None) -> None:
+        """Store a new LLM response in the response caches and the checkpoint"""
+        self._cache_put(situation.key, response)
+        self._checkpoint_put(situation.prompt_hash, response, step, case_id)
+    
+    def make_decision(self, vessels: VesselsLike, time_idx: int = 0,
+                      case_id: Optional[int] = None) -> str:
+        """Make a COLREGs-compliant decision for a list of VesselState or a VesselBatch array;
+        time_idx and case_id (default: self.case_id) are recorded in the checkpoint"""
         if not self.provider:
             return "No LLM provider available"
         
-        if not vessels:
+        if len(vessels) == 0:
             return "No vessels detected - maintain course and speed"
         
-        # Format the situation
-        situation_description = self._format_situation_description(vessels)
-        
-        # Create full prompt
-        full_prompt = f"{self.system_prompt}\n\n{situation_description}"
+        response, situation = self._lookup(as_vessel_batch(vessels))
+        if situation is None:
+            return self._tag_response(response)
         
         # Get response from LLM
-        response = self.provider.generate_response(full_prompt)
+        provider_name, response = self._generate(situation.description)
+        self._record(situation, response, time_idx, case_id)
+        
+        return self._tag_response(response, provider_name)
+    
+    async def make_decisions_async(self, batch: List[VesselsLike],
+                                   case_id: Optional[int] = None) -> List[str]:
+        """Make decisions for several situations concurrently, at most concurrency_limit at a time;
+        situations with the same cache key share one request (the position in batch is
+        recorded as the step in the checkpoint). The requests run on the interpreter's event loop."""
+        return await asyncio.wrap_future(self._submit(self._amake_decisions(batch, case_id)))
+    
+    async def _amake_decisions(self, batch: List[VesselsLike],
+                               case_id: Optional[int] = None) -> List[str]:
+        """make_decisions_async on the interpreter's event loop"""
+        if not self.provider:
+            return ["No LLM provider available"] * len(batch)
+        
+        decisions: List[Optional[str]] = [None] * len(batch)
+        unique: Dict[tuple, Tuple[_Situation, List[int]]] = {}
+        for step, vessels in enumerate(batch):
+            if len(vessels) == 0:
+                decisions[step] = "No vessels detected - maintain course and speed"
+                continue
+            response, situation = self._lookup(as_vessel_batch(vessels))
+            if situation is None:
+                decisions[step] = self._tag_response(response)
+            else:
+                unique.setdefault(situation.key, (situation, []))[1].append(step)
+        
+        semaphore = asyncio.Semaphore(self.concurrency_limit)
+        
+        async def decide(situation: _Situation, steps: List[int]) -> None:
+            async with semaphore:
+                provider_name, response = await self._agenerate(situation.description)
+            self._record(situation, response, steps[0], case_id)
+            for step in steps:
+                decisions[step] = self._tag_response(response, provider_name)
+        
+        await asyncio.gather(*[decide(situation, steps) for situation, steps in unique.values()])
+        return decisions
+    
+    def make_decision_batch(self, batch: List[VesselsLike],
+                            case_id: Optional[int] = None) -> List[str]:
+        """Synchronous wrapper around make_decisions_async, e.g. for sweeping Imazu cases"""
+        return self._submit(self._amake_decisions(batch, case_id)).result()
+    
+    def _format_marshalled_prompt(self, descriptions: List[str]) -> str:
+        """Format several situations into one request that asks for one answer line per situation"""
+        situations = "\n\n".join(
+            f"Situation {k}:\n{description}" for k, description in enumerate(descriptions, 1)
+        )
+        return (f"Respond with exactly {len(descriptions)} lines, one per situation in the same order "
+                f"and without numbering, each in the format: Rule X (head-on/overtaking/crossing), "
+                f"Action: [action], Explanation: [explanation]\n\n{situations}")
+    
+    def make_decision_marshalled(self, vessels_per_step: List[VesselsLike], group_size: int = 8,
+                                 case_id: Optional[int] = None) -> List[str]:
+        """
+        Make decisions for many steps (e.g. offline Imazu evaluation) with one LLM request
+        per group_size distinct uncached situations. Situations whose answer line fails
+        validation are re-requested one at a time; if the answer does not have exactly one
+        line per situation, the lines cannot be matched up and the whole group is. The
+        position in vessels_per_step is recorded as the step in the checkpoint.
+        """
+        if not self.provider:
+            return ["No LLM provider available"] * len(vessels_per_step)
+        
+        decisions: List[Optional[str]] = [None] * len(vessels_per_step)
+        unique: Dict[tuple, Tuple[_Situation, List[int]]] = {}
+        for idx, vessels in enumerate(vessels_per_step):
+            if len(vessels) == 0:
+                decisions[idx] = "No vessels detected - maintain course and speed"
+                continue
+            response, situation = self._lookup(as_vessel_batch(vessels))
+            if situation is None:
+                decisions[idx] = self._tag_response(response)
+            else:
+                unique.setdefault(situation.key, (situation, []))[1].append(idx)
+        
+        def record(situation: _Situation, steps: List[int], response: str, provider_name: str) -> None:
+            self._record(situation, response, steps[0], case_id)
+            for idx in steps:
+                decisions[idx] = self._tag_response(response, provider_name)
         
-        # Add provider information
-        provider_info = f"[{self.provider_name.upper()}] "
+        pending = list(unique.values())
+        for start in range(0, len(pending), group_size):
+            group = pending[start:start + group_size]
+            provider_name, response = self._generate(
+                self._format_marshalled_prompt([situation.description for situation, _ in group]))
+            lines = [line.strip() for line in response.splitlines() if line.strip()]
+            
+            if len(lines) != len(group):
+                lines = [None] * len(group)
+            
+            for (situation, steps), line in zip(group, lines):
+                if line is not None and ResponseValidator.parse_response(line) is not None:
+                    record(situation, steps, line, provider_name)
+                else:
+                    record(situation, steps, *self._generate(situation.description)[::-1])
         
-        return f"{provider_info}{response}"
+        return decisions
     
     def get_available_providers(self) -> List[str]:
         """Get list of available LLM providers"""
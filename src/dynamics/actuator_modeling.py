@@ -1,6 +1,8 @@
 import numpy as np
+from src.utils.jit import jit_kernel
 
 
+@jit_kernel
 def actuator_modeling(tau_c, sat_amp_s):
     tau_ac = tau_c
 
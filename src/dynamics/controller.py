@@ -1,3 +1,7 @@
+from src.utils.jit import jit_kernel
+
+
+@jit_kernel
 def controller(psi_p, psi, r, v_p, b, ui_psi1, Ts):
     """
     Controller function for yaw and speed control.
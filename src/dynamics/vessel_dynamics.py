@@ -1,13 +1,15 @@
 import numpy as np
 
 
-def vessel_dynamics(x_0, inputs):
+def vessel_dynamics(x_0, inputs, out=None, rng=None):
     """
     Calculate the vessel dynamics.
 
     Parameters:
     x_0 (numpy.array): Initial state [x, y, psi, r, b, u]
     inputs (numpy.array): Control inputs [tau_c, u_c]
+    out (numpy.array, optional): Preallocated 6-element array to write the derivatives into
+    rng (numpy.random.Generator, optional): Source of the bias noise; NumPy's global RNG if None
 
     Returns:
     numpy.array: State derivatives [x_dot, y_dot, psi_dot, r_dot, b_dot, u_dot]
@@ -28,13 +30,21 @@ def vessel_dynamics(x_0, inputs):
     psi_dot = r
 
     w_r = 0
-    w_b = 0.5 * np.random.randn()
+    w_b = 0.5 * (np.random.randn() if rng is None else rng.standard_normal())
 
     # Nomoto model
     r_dot = -(1/t_psi) * r + (1/t_psi) * k_psi * (tau_c - b) + w_r
     b_dot = -(1/t_b) * b + w_b
     u_dot = -(1/t_v) * u + (1/t_v) * k_v * u_c
 
-    x_dot = np.array([x_dot, y_dot, psi_dot, r_dot, b_dot, u_dot])
+    if out is None:
+        return np.array([x_dot, y_dot, psi_dot, r_dot, b_dot, u_dot])
 
-    return x_dot
+    out[0] = x_dot
+    out[1] = y_dot
+    out[2] = psi_dot
+    out[3] = r_dot
+    out[4] = b_dot
+    out[5] = u_dot
+
+    return out
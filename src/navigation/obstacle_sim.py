@@ -21,22 +21,16 @@ def obstacle_sim(x_ob0, y_ob0, v_ob, psi_ob, dt):
         vx_ob (numpy.array): x-components of obstacle velocities
         vy_ob (numpy.array): y-components of obstacle velocities
     """
-    x_ob = np.zeros_like(x_ob0)
-    y_ob = np.zeros_like(y_ob0)
-    vx_ob = np.zeros_like(v_ob)
-    vy_ob = np.zeros_like(v_ob)
+    x_ob0 = np.asarray(x_ob0, dtype=np.float64)
+    y_ob0 = np.asarray(y_ob0, dtype=np.float64)
+    v_ob = np.asarray(v_ob, dtype=np.float64)
+    psi_ob = np.asarray(psi_ob, dtype=np.float64)
 
-    for i in range(len(x_ob0)):
-        x_0 = np.array([x_ob0[i], y_ob0[i]])
+    # All obstacles at once, no per-obstacle state arrays
+    vx_ob = v_ob * np.cos(psi_ob)
+    vy_ob = v_ob * np.sin(psi_ob)
 
-        vx_ob[i] = v_ob[i] * np.cos(psi_ob[i])
-        vy_ob[i] = v_ob[i] * np.sin(psi_ob[i])
-
-        x_dot = np.array([vx_ob[i], vy_ob[i]])
-
-        x = integration(x_0, x_dot, dt)
-
-        x_ob[i] = x[0]
-        y_ob[i] = x[1]
+    x_ob = integration(x_ob0, vx_ob, dt)
+    y_ob = integration(y_ob0, vy_ob, dt)
 
     return x_ob, y_ob, vx_ob, vy_ob
@@ -4,6 +4,11 @@ def waypoint_selection(Xwpt, Ywpt, x, y, i_wpt):
     """
     Updates the waypoint index based on the vessel's position.
 
+    The index advances once for every remaining waypoint inside the
+    circle of acceptance. Short routes (up to 3 waypoints) test them in
+    a loop; longer routes test all remaining waypoints in one vectorized
+    distance computation.
+
     Parameters:
     Xwpt (array-like): X-coordinates of waypoints
     Ywpt (array-like): Y-coordinates of waypoints
@@ -17,12 +22,16 @@ def waypoint_selection(Xwpt, Ywpt, x, y, i_wpt):
    
     Circ = 200/1852  # Threshold distance for selecting the next waypoint
 
-    for j in range(i_wpt, len(Xwpt)):
-        if np.sqrt((Xwpt[j] - x)**2 + (Ywpt[j] - y)**2) < Circ:
-            if i_wpt < len(Xwpt) - 1:
-                i_wpt += 1
+    if len(Xwpt) <= 3:
+        for j in range(i_wpt, len(Xwpt)):
+            if np.hypot(Xwpt[j] - x, Ywpt[j] - y) < Circ:
+                if i_wpt < len(Xwpt) - 1:
+                    i_wpt += 1
+        return i_wpt
 
-    return i_wpt
+    reached = np.count_nonzero(np.hypot(np.asarray(Xwpt[i_wpt:]) - x,
+                                        np.asarray(Ywpt[i_wpt:]) - y) < Circ)
+    return min(i_wpt + reached, len(Xwpt) - 1)
 
 def planning(Xwpt, Ywpt, x, y, i_wpt):
     """
@@ -47,7 +56,7 @@ def planning(Xwpt, Ywpt, x, y, i_wpt):
     Yewpt = Ywpt[i_wpt] - y
     # print(Xewpt, Yewpt)
 
-    L = np.sqrt((Xwpt[i_wpt] - Xwpt[i_wpt - 1])**2 + (Ywpt[i_wpt] - Ywpt[i_wpt - 1])**2)
+    L = np.hypot(Xwpt[i_wpt] - Xwpt[i_wpt - 1], Ywpt[i_wpt] - Ywpt[i_wpt - 1])
     S = (Xewpt * (Xwpt[i_wpt] - Xwpt[i_wpt - 1]) + Yewpt * (Ywpt[i_wpt] - Ywpt[i_wpt - 1])) / L
 
     delta_p = np.arctan2(Ywpt[i_wpt] - Ywpt[i_wpt - 1], Xwpt[i_wpt] - Xwpt[i_wpt - 1]) - np.arctan2(Yewpt, Xewpt)
@@ -1,5 +1,22 @@
+import math
 import numpy as np
-from scipy.special import expit  # For the sigmoid function
+from src.utils.jit import jit_kernel, NUMBA_AVAILABLE
+
+# Range thresholds of the range weight (nmi) and width of the bearing weight (rad)
+_A_NMI = 600.0 / 1852
+_B_NMI = 1200.0 / 1852
+_MID_NMI = (_A_NMI + _B_NMI) / 2
+_B_MINUS_A = _B_NMI - _A_NMI
+_SIG = 80 * np.pi / 180
+_INV_2SIG2 = 1.0 / (2 * _SIG**2)
+
+# Default working precision of reactive_avoidance (float32 halves the memory traffic;
+# float64 keeps simulation results reproducible)
+USE_FP32 = False
+
+# Below this many obstacles the pure-Python loop beats NumPy's per-call overhead
+# (measured without numba: ~2.5 us vs ~25 us at n=1, break-even around n=30)
+_SCALAR_MAX_N = 24
 
 
 def zmf(x, a, b):
@@ -15,15 +32,113 @@ def zmf(x, a, b):
     return y
 
 
-def reactive_avoidance(x_ob, y_ob, x, y, psi, t):
+@jit_kernel
+def _zmf_scalar(x, a, b):
+    """
+    Z-shaped membership function as a single pass over ``x`` (compiled with Numba).
+    """
+    out = np.empty_like(x)
+    mid = (a + b) / 2
+    denom = b - a
+    for i in range(x.size):
+        xi = x[i]
+        if xi <= a:
+            out[i] = 1.0
+        elif xi < mid:
+            t = (xi - a) / denom
+            out[i] = 1 - 2 * t * t
+        elif xi < b:
+            t = (xi - b) / denom
+            out[i] = 2 * t * t
+        else:
+            out[i] = 0.0
+    return out
+
+
+@jit_kernel
+def _reactive_avoidance_nb(x_ob, y_ob, x, y, psi):
+    """
+    Reactive avoidance as a single loop over the obstacles (compiled with Numba).
+    """
+    n = x_ob.size
+    distance_ob = np.empty(n)
+    bearing_ob = np.empty(n)
+    w_b = np.empty(n)
+    psi_oa = 0.0
+    for i in range(n):
+        dx = x_ob[i] - x
+        dy = y_ob[i] - y
+        distance_ob[i] = np.hypot(dx, dy)
+        bearing_ob[i] = psi - np.arctan2(dy, dx)
+        w_b[i] = -np.exp(-(bearing_ob[i] * bearing_ob[i]) * _INV_2SIG2)
+    w_r = _zmf_scalar(distance_ob, _A_NMI, _B_NMI)
+    for i in range(n):
+        psi_oa += w_r[i] * w_b[i]
+    return psi_oa * 2, w_b, w_r, distance_ob, bearing_ob
+
+
+def _reactive_avoidance_np(x_ob, y_ob, x, y, psi, dtype):
+    """
+    Vectorized reactive avoidance in the precision ``dtype`` (inputs already of that dtype).
+    """
+    dx = x_ob - x
+    dy = y_ob - y
+    distance_ob = np.hypot(dx, dy)
+    bearing_ob = psi - np.arctan2(dy, dx)
+
+    w_r = zmf(distance_ob, dtype.type(_A_NMI), dtype.type(_B_NMI))
+    w_b = np.square(bearing_ob)
+    w_b *= dtype.type(-_INV_2SIG2)
+    np.exp(w_b, out=w_b)
+    np.negative(w_b, out=w_b)
+
+    psi_oa = np.dot(w_r, w_b) * 2
+
+    return psi_oa, w_b, w_r, distance_ob, bearing_ob
+
+
+def _reactive_avoidance_scalar(x_ob, y_ob, x, y, psi):
+    """
+    Reactive avoidance with math scalars for a few obstacles (used without numba).
+    """
+    n = len(x_ob)
+    distance_ob = [0.0] * n
+    bearing_ob = [0.0] * n
+    w_r = [0.0] * n
+    w_b = [0.0] * n
+    psi_oa = 0.0
+    for i, (xo, yo) in enumerate(zip(x_ob.tolist(), y_ob.tolist())):
+        dx = xo - x
+        dy = yo - y
+        d = math.hypot(dx, dy)
+        bearing = psi - math.atan2(dy, dx)
+        if d <= _A_NMI:
+            wr = 1.0
+        elif d < _MID_NMI:
+            t = (d - _A_NMI) / _B_MINUS_A
+            wr = 1 - 2 * t * t
+        elif d < _B_NMI:
+            t = (d - _B_NMI) / _B_MINUS_A
+            wr = 2 * t * t
+        else:
+            wr = 0.0
+        wb = -math.exp(-(bearing * bearing) * _INV_2SIG2)
+        distance_ob[i], bearing_ob[i], w_r[i], w_b[i] = d, bearing, wr, wb
+        psi_oa += wr * wb
+    return (psi_oa * 2, np.array(w_b), np.array(w_r),
+            np.array(distance_ob), np.array(bearing_ob))
+
+
+def reactive_avoidance(x_ob, y_ob, x, y, psi, t, dtype=None):
     """
     Perform reactive avoidance.
 
     Parameters:
-    x_ob, y_ob (array-like): Positions of obstacles
+    x_ob, y_ob (numpy.array): Positions of obstacles (arrays of the working dtype are used without copying)
     x, y (float): Current position of the vessel
     psi (float): Current heading of the vessel
     t (float): Current time (not used in this function)
+    dtype (numpy.dtype, optional): Working precision, float32 if USE_FP32 else float64 by default
 
     Returns:
     tuple: (psi_oa, w_b, w_r, distance_ob, bearing_ob)
@@ -33,22 +148,20 @@ def reactive_avoidance(x_ob, y_ob, x, y, psi, t):
         distance_ob (numpy.array): Distances to obstacles
         bearing_ob (numpy.array): Bearings to obstacles
     """
-    a = 600.0/1852
-    b = 1200/1852
-
-    x_distro = np.arange(-90, 90.1, 0.1)
-    c = 0
-    sig = 80 * np.pi / 180
+    if dtype is None:
+        dtype = np.float32 if USE_FP32 else np.float64
+    dtype = np.dtype(dtype)
 
-    distance_ob = np.sqrt((np.array(x_ob) - x)**2 + (np.array(y_ob) - y)**2)
-    #print(distance_ob)
-    #distance_ob = sum(distance_ob)
-    los_ob = np.arctan2((np.array(y_ob) - y), (np.array(x_ob) - x))
+    x_ob = np.ascontiguousarray(x_ob, dtype=dtype).reshape(-1)
+    y_ob = np.ascontiguousarray(y_ob, dtype=dtype).reshape(-1)
 
-    bearing_ob = psi - los_ob
-    w_r = zmf(distance_ob, a, b)
-    w_b = -np.exp(-(bearing_ob**2) / (2 * sig**2))
+    # The numba and scalar paths compute in float64
+    if dtype != np.float64:
+        return _reactive_avoidance_np(x_ob, y_ob, dtype.type(x), dtype.type(y), dtype.type(psi), dtype)
 
-    psi_oa = np.sum(w_r * w_b) * 2
+    if NUMBA_AVAILABLE:
+        return _reactive_avoidance_nb(x_ob, y_ob, float(x), float(y), float(psi))
+    if x_ob.size < _SCALAR_MAX_N:
+        return _reactive_avoidance_scalar(x_ob, y_ob, float(x), float(y), float(psi))
 
-    return psi_oa, w_b, w_r, distance_ob, bearing_ob
+    return _reactive_avoidance_np(x_ob, y_ob, float(x), float(y), float(psi), dtype)
@@ -25,8 +25,8 @@ def cpa_calculations2(v_x, v_y, vx_ob, vy_ob, psi, psi_ob, distance_ob, bearing_
     psi = -(psi - np.pi/2)
     psi_ob = -(psi_ob - np.pi/2)
 
-    v = np.sqrt(v_x**2 + v_y**2)
-    v_ob = np.sqrt(vx_ob**2 + vy_ob**2)
+    v = np.hypot(v_x, v_y)
+    v_ob = np.hypot(vx_ob, vy_ob)
 
     v_rel = np.sqrt(v**2 + v_ob**2 - 2*v*v_ob*np.cos(psi - psi_ob))
 
@@ -1,30 +1,35 @@
 import numpy as np
+from src.utils.jit import jit_kernel
 
 
+@jit_kernel
 def cpa_calculations_0speed(x, y, x_obs, y_obs, v_x, v_y, vx_ob, vy_ob, distance_ob):
     """
     Calculate Closest Point of Approach (CPA) parameters.
 
+    All obstacle arguments may be arrays, in which case every obstacle is
+    evaluated in a single vectorized pass.
+
     Parameters:
     x, y (float): Position of the vessel
-    x_obs, y_obs (float): Position of the obstacle
+    x_obs, y_obs (float or numpy.array): Position of the obstacle(s)
     v_x, v_y (float): Velocity components of the vessel
-    vx_ob, vy_ob (float): Velocity components of the obstacle
-    distance_ob (float): Distance to the obstacle
+    vx_ob, vy_ob (float or numpy.array): Velocity components of the obstacle(s)
+    distance_ob (float or numpy.array): Distance to the obstacle(s)
 
     Returns:
     tuple: (DCPA, TCPA, relative_speed, alpha, psi_Vrel)
-        DCPA (float): Distance at Closest Point of Approach
-        TCPA (float): Time to Closest Point of Approach
-        relative_speed (float): Relative speed between vessel and obstacle
-        alpha (float): Angle between line of sight and relative velocity
-        psi_Vrel (float): Angle of relative velocity
+        DCPA (float or numpy.array): Distance at Closest Point of Approach
+        TCPA (float or numpy.array): Time to Closest Point of Approach
+        relative_speed (float or numpy.array): Relative speed between vessel and obstacle
+        alpha (float or numpy.array): Angle between line of sight and relative velocity
+        psi_Vrel (float or numpy.array): Angle of relative velocity
     """
 
     v_x_rel = vx_ob - v_x
     v_y_rel = vy_ob - v_y
 
-    relative_speed = np.sqrt(v_x_rel**2 + v_y_rel**2)
+    relative_speed = np.hypot(v_x_rel, v_y_rel)
 
     psi_Vrel = np.arctan2(vy_ob - v_y, vx_ob - v_x)
 
@@ -3,68 +3,73 @@ import numpy as np
 def nautical_to_meters(nm_value):
     return nm_value * 1852
 
+# Imazu obstacle cases 1-23: one [x (nmi), y (nmi), heading (deg)] row per obstacle
+_CASE_ROWS = [
+    [[6, 0, 180]],  # Case 1
+    [[5, -2.14, 90]],  # Case 2
+    [[3, 0, 0]],  # Case 3
+    [[3.44, 1.55 + 0.08, 295]],  # Case 4
+    [[5, -2.0-0.14, 90], [7-0.05, 0, 180]],  # Case 5
+    [[3.4, -1.5 + 0.03, 45], [3, -0.35-0.04, 10]],  # Case 6
+    [[3, 0, 0], [3.4, -1.5+0.01, 45]],  # Case 7
+    [[5, -2.13, 90], [7, 0, 180]],  # Case 8
+    [[3.4, -1.5 + 0.03, 45], [5, -2.1 - 0.05, 90]],  # Case 9
+    [[3, 0.35, 350], [4.4, -2.1 + 0.20, 90]],  # Case 10
+    [[5, 2.1, -90], [3.4, -1.5, 45]],  # Case 11
+    [[7, 0, 180], [3, 0.3+0.05, -10], [3.44, -1.55+0.05, 45]],  # Case 12
+    [[6, 0, 180], [3, 0.3+0.05, 350], [3.4, 1.5+0.05, 295]],  # Case 13
+    [[3.4, -1.5, 45], [3, -0.4, 10], [5, -2.1-0.05, 90]],  # Case 14
+    [[3, 0, 0], [3.4, -1.5, 45], [5, -2.1-0.05, 90]],  # Case 15
+    [[3.4, 1.5-0.03, -45], [5, 2.1 + 0.04, -90], [5, -2.1 + -0.05, 90]],  # Case 16
+    [[3, 0, 0], [3, 0.3+0.05, -10], [3.4, -1.5, 45]],  # Case 17
+    [[3.3, -0.3 - 0.1, 10], [3.4, -1.5+0.05, 45], [6.5, -1.5, 135]],  # Case 18
+    [[3, -0.3 - 0.07, 10], [3, 0.3+0.05, -10], [6.5, -1.5-0.03, 135]],  # Case 19
+    [[3, 0, 0], [3, -0.3-0.05, 10], [4.4, -2.1 + 0.25, 90]],  # Case 20
+    [[3-0.3, -0.3-0.05, 10], [3-0.3, 0.3+0.02, -10], [4.4, -1.9, 90]],  # Case 21
+    [[3, 0, 0], [3.94, -1.6-0.13, 45], [5, -2.01-0.15, 90]],  # Case 22
+    [[4.243, 2.243, -75]],  # Case 23
+]
+
+# All cases in one contiguous, read-only (n_obstacles_total, 3) float64 array of
+# [x_m, y_m, psi_rad]; obstacles of case n are rows _CASE_OFFSETS[n-1]:_CASE_OFFSETS[n]
+_CASES_FLAT = np.array([row for case in _CASE_ROWS for row in case], dtype=np.float64)
+_CASES_FLAT[:, 0:2] *= 1852
+_CASES_FLAT[:, 2] = np.radians(_CASES_FLAT[:, 2])
+_CASES_FLAT.setflags(write=False)
+_CASE_OFFSETS = np.concatenate(([0], np.cumsum([len(case) for case in _CASE_ROWS])))
+
+# String-keyed view of the cases in the original nested format, [[x_m, y_m], heading_deg]
+# per obstacle, kept for backward-compatible lookups only (deprecated)
 obstacle_cases = {
-    "Case 1": [[[nautical_to_meters(6), nautical_to_meters(0)], 180]],
-    "Case 2": [[[nautical_to_meters(5), nautical_to_meters(-2.14)], 90]],
-    "Case 3": [[[nautical_to_meters(3), nautical_to_meters(0)], 0]],
-    "Case 4": [[[nautical_to_meters(3.44), nautical_to_meters(1.55 + 0.08 )], 295]],
-    "Case 5": [[[nautical_to_meters(5), nautical_to_meters(-2.0-0.14)], 90], [[nautical_to_meters(7-0.05), nautical_to_meters(0)], 180]],
-    "Case 6": [[[nautical_to_meters(3.4), nautical_to_meters(-1.5 + 0.03)], 45], [[nautical_to_meters(3), nautical_to_meters(-0.35-0.04)], 10]],
-    "Case 7": [[[nautical_to_meters(3), nautical_to_meters(0)], 0], [[nautical_to_meters(3.4), nautical_to_meters(-1.5+0.01)], 45]],
-    "Case 8": [[[nautical_to_meters(5), nautical_to_meters(-2.13)], 90], [[nautical_to_meters(7), nautical_to_meters(0)], 180]],
-    "Case 9": [[[nautical_to_meters(3.4), nautical_to_meters(-1.5 + 0.03)], 45], [[nautical_to_meters(5), nautical_to_meters(-2.1 - 0.05)], 90]],
-    "Case 10": [[[nautical_to_meters(3), nautical_to_meters(0.35)], 350], [[nautical_to_meters(4.4), nautical_to_meters(-2.1 + 0.20)], 90]],
-    "Case 11": [[[nautical_to_meters(5), nautical_to_meters(2.1)], -90], [[nautical_to_meters(3.4), nautical_to_meters(-1.5)], 45]],
-    "Case 12": [[[nautical_to_meters(7), nautical_to_meters(0)], 180], [[nautical_to_meters(3), nautical_to_meters(0.3+0.05)], -10], [[nautical_to_meters(3.44), nautical_to_meters(-1.55+0.05)], 45]],
-    "Case 13": [[[nautical_to_meters(6), nautical_to_meters(0)], 180], [[nautical_to_meters(3), nautical_to_meters(0.3+0.05)], 350], [[nautical_to_meters(3.4), nautical_to_meters(1.5+0.05)], 295]],
-    "Case 14": [[[nautical_to_meters(3.4), nautical_to_meters(-1.5)], 45], [[nautical_to_meters(3), nautical_to_meters(-0.4)], 10], [[nautical_to_meters(5), nautical_to_meters(-2.1-0.05)], 90]],
-    "Case 15": [[[nautical_to_meters(3), nautical_to_meters(0)], 0], [[nautical_to_meters(3.4), nautical_to_meters(-1.5)], 45], [[nautical_to_meters(5), nautical_to_meters(-2.1-0.05)], 90]],
-    "Case 16": [[[nautical_to_meters(3.4), nautical_to_meters(1.5-0.03)], -45], [[nautical_to_meters(5), nautical_to_meters(2.1 + 0.04)], -90], [[nautical_to_meters(5), nautical_to_meters(-2.1 + -0.05)], 90]],
-    "Case 17": [[[nautical_to_meters(3), nautical_to_meters(0)], 0], [[nautical_to_meters(3), nautical_to_meters(0.3+0.05)], -10], [[nautical_to_meters(3.4), nautical_to_meters(-1.5)], 45]],
-    "Case 18": [[[nautical_to_meters(3.3), nautical_to_meters(-0.3 - 0.1)], 10], [[nautical_to_meters(3.4), nautical_to_meters(-1.5+0.05)], 45], [[nautical_to_meters(6.5), nautical_to_meters(-1.5)], 135]],
-    "Case 19": [[[nautical_to_meters(3), nautical_to_meters(-0.3 - 0.07)], 10], [[nautical_to_meters(3), nautical_to_meters(0.3+0.05)], -10], [[nautical_to_meters(6.5), nautical_to_meters(-1.5-0.03)], 135]],
-    "Case 20": [[[nautical_to_meters(3), nautical_to_meters(0)], 0], [[nautical_to_meters(3), nautical_to_meters(-0.3-0.05)], 10], [[nautical_to_meters(4.4), nautical_to_meters(-2.1 + 0.25)], 90]],
-    "Case 21": [[[nautical_to_meters(3-0.3), nautical_to_meters(-0.3-0.05)], 10], [[nautical_to_meters(3-0.3), nautical_to_meters(0.3+0.02)], -10], [[nautical_to_meters(4.4), nautical_to_meters(-1.9)], 90]],
-    "Case 22": [[[nautical_to_meters(3), nautical_to_meters(0)], 0], [[nautical_to_meters(3.94), nautical_to_meters(-1.6-0.13)], 45], [[nautical_to_meters(5), nautical_to_meters(-2.01-0.15)], 90]],
-    "Case 23": [[[nautical_to_meters(4.243), nautical_to_meters(2.243)], -75]],
-    
+    f"Case {n}": [[[nautical_to_meters(x), nautical_to_meters(y)], psi] for x, y, psi in case]
+    for n, case in enumerate(_CASE_ROWS, 1)
 }
 
+
 # Function to get obstacles for a specific case
 def get_obstacles(case_number):
-    case_key = f"Case {case_number}"
-    return obstacle_cases.get(case_key, [])
+    """
+    Obstacles of a case as a read-only (n_obs, 3) view of [x_m, y_m, psi_rad] rows
+    (empty for an unknown case)
+    """
+    if not 1 <= case_number < len(_CASE_OFFSETS):
+        return _CASES_FLAT[:0]
+    return _CASES_FLAT[_CASE_OFFSETS[case_number - 1]:_CASE_OFFSETS[case_number]]
 
 
 def get_obstacle_data(case_number):
     """
     Convert obstacle case data to simulation format
     Args:
-        case_number (int): The case number to use (1-22)
+        case_number (int): The case number to use (1-23)
     Returns:
-        Xob, Yob (lists): X and Y positions in meters
+        Xob, Yob (numpy arrays): X and Y positions in meters (read-only views)
         Vob (list): Velocities in m/s 
-        psiob (numpy array): Angles in radians
+        psiob (numpy array): Angles in radians (read-only view)
     """
-    # Get obstacle data for the case
-    obstacles = get_obstacles(case_number)
-    
-    # Initialize empty lists
-    Xob = []
-    Yob = []
-    psiob = []
+    arr = get_obstacles(case_number)
     
     # Default velocity (you may want to adjust this)
-    Vob = [18.52] * len(obstacles)  # Assuming 9.5 m/s for all obstacles
+    Vob = [18.52] * len(arr)  # Assuming 9.5 m/s for all obstacles
     
-    # Extract positions and angles from obstacles
-    for obstacle in obstacles:
-        position = obstacle[0]  # Get [x,y] position
-        angle = obstacle[1]    # Get angle in degrees
-        
-        Xob.append(position[0])  # X position in meters
-        Yob.append(position[1])  # Y position in meters
-        psiob.append(np.radians(angle))  # Convert angle to radians
-    
-    return Xob, Yob, Vob, np.array(psiob)
-
+    return arr[:, 0], arr[:, 1], Vob, arr[:, 2]
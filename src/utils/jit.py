@@ -0,0 +1,28 @@
+"""
+Optional Numba JIT support for the small numeric kernels of the simulation.
+When numba is not installed, kernels run as plain Python/NumPy code.
+"""
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+def jit_kernel(func):
+    """
+    Compile a numeric kernel with Numba if it is available.
+
+    Uses NumPy's error model, so division by zero gives inf/NaN (as in the
+    uncompiled kernels) instead of raising ZeroDivisionError.
+
+    Parameters:
+    func (callable): Function using only scalar math / NumPy operations
+
+    Returns:
+    callable: Compiled function, or ``func`` unchanged without numba
+    """
+    if NUMBA_AVAILABLE:
+        return njit(cache=True, error_model='numpy')(func)
+    return func
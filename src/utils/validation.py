@@ -1,7 +1,66 @@
 import re
-from typing import Optional, Tuple, Dict
+from itertools import accumulate
+from contextvars import ContextVar, Token
+from typing import Optional, Tuple, Dict, Iterable, List
 from dataclasses import dataclass
-from src.decision_making.decision_makingllm1 import decision_making_llm
+
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+# Expected format: "Rule X (situation type), Action: [action], Explanation: [explanation]"
+# (the system prompt asks for "Explanation", older prompts used "explanation")
+_RULE_RE = re.compile(r"Rule (\d+) \(([\w-]+)\), Action: ([\w\s,-]+), [Ee]xplanation: (.+)")
+
+_VALID_ACTIONS = frozenset({
+    "Stand on, no action",
+    "Give-way, turn to starboard",
+    "Give-way, turn to port",
+    "Continue current maneuver"
+})
+
+_VALID_SITUATIONS = frozenset({"head-on", "overtaking", "crossing"})
+
+_HS_DB = None
+
+# Maneuver state of the current simulation run. Each thread / asyncio task has its own
+# value, so cases can run in parallel. The dict is replaced, never mutated.
+_DEFAULT_MANEUVER = {"is_turning": False, "initial_situation": None}
+_MANEUVER: ContextVar[Dict] = ContextVar("maneuver", default=_DEFAULT_MANEUVER)
+
+
+def reset_maneuver() -> Token:
+    """
+    Clear the maneuver state; call at the start of each simulation run.
+    Returns a token that can be passed to _MANEUVER.reset() to restore the previous state.
+    """
+    return _MANEUVER.set(dict(_DEFAULT_MANEUVER))
+
+
+def update_maneuver(**changes) -> None:
+    """Update fields (is_turning, initial_situation) of the current maneuver state."""
+    _MANEUVER.set({**_MANEUVER.get(), **changes})
+
+
+def _hyperscan_db():
+    """
+    Compile the response pattern into a Hyperscan database on first use. The pattern matches
+    a NUL-delimited response start up to the first explanation character, so every valid
+    response reports one match whose start offset is its delimiter.
+    """
+    global _HS_DB
+    if _HS_DB is None:
+        expression = _RULE_RE.pattern.replace("(.+)", r"[^\x00\n]")
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[rb"\x00" + expression.encode()],
+            ids=[1],
+            flags=[hyperscan.HS_FLAG_SOM_LEFTMOST | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP]
+        )
+        _HS_DB = db
+    return _HS_DB
 
 @dataclass
 class ValidatedResponse:
@@ -13,14 +72,10 @@ class ValidatedResponse:
 
 class ResponseValidator:
     # Valid actions that can be taken
-    VALID_ACTIONS = [
-        "Stand on, no action",
-        "Give-way, turn to starboard",
-        "Give-way, turn to port"
-    ]
+    VALID_ACTIONS = _VALID_ACTIONS
     
     # Valid situation types
-    VALID_SITUATIONS = ["head-on", "overtaking", "crossing"]
+    VALID_SITUATIONS = _VALID_SITUATIONS
     
     @staticmethod
     def parse_response(llm_response: str) -> Optional[ValidatedResponse]:
@@ -28,31 +83,60 @@ class ResponseValidator:
         Parse and validate the LLM response format.
         Returns None if the response is invalid.
         """
-        try:
-            # Expected format: "Rule X (situation type), Action: [action], explanation: [explanation]"
-            pattern = r"Rule (\d+) \(([\w-]+)\), Action: ([\w\s,-]+), explanation: (.+)"
-            match = re.match(pattern, llm_response.strip())
-            
-            if not match:
-                return None
-                
-            rule, situation, action, explanation = match.groups()
-            
-            # Validate each component
-            if (situation.lower() not in ResponseValidator.VALID_SITUATIONS or
-                action.strip() not in ResponseValidator.VALID_ACTIONS):
-                return None
-                
-            return ValidatedResponse(
-                rule=rule,
-                situation_type=situation.lower(),
-                action=action.strip(),
-                explanation=explanation.strip()
-            )
+        if not isinstance(llm_response, str):
+            return None
+        
+        match = _RULE_RE.match(llm_response.strip())
+        
+        if not match:
+            return None
             
-        except Exception as e:
-            print(f"Error parsing LLM response: {e}")
+        rule, situation, action, explanation = match.groups()
+        situation = situation.lower()
+        action = action.strip()
+        
+        # Validate each component
+        if situation not in _VALID_SITUATIONS or action not in _VALID_ACTIONS:
             return None
+            
+        return ValidatedResponse(
+            rule=rule,
+            situation_type=situation,
+            action=action,
+            explanation=explanation.strip()
+        )
+    
+    @staticmethod
+    def parse_batch(llm_responses: Iterable[str]) -> List[Optional[ValidatedResponse]]:
+        """
+        Parse and validate many LLM responses, e.g. when replaying logged or cached responses.
+        Hyperscan (if installed) scans all responses in one pass over a NUL-joined buffer and
+        rejects malformed ones without running the regex; only matching responses are then
+        parsed with the compiled pattern.
+        Returns one entry per response, None where the response is invalid.
+        """
+        if not HYPERSCAN_AVAILABLE:
+            return [ResponseValidator.parse_response(r) for r in llm_responses]
+        
+        llm_responses = list(llm_responses)
+        if not llm_responses:
+            return []
+        
+        # Response k starts at its delimiter, offsets[k] bytes into the buffer
+        chunks = [r.strip().encode() if isinstance(r, str) else b"" for r in llm_responses]
+        offsets = accumulate((len(chunk) + 1 for chunk in chunks[:-1]), initial=0)
+        index = {offset: k for k, offset in enumerate(offsets)}
+        
+        candidates = set()
+        
+        def on_match(_id, start, _end, _flags, _context):
+            # A NUL inside a response gives a start offset that is not a delimiter
+            if start in index:
+                candidates.add(index[start])
+        
+        _hyperscan_db().scan(b"".join(b"\0" + chunk for chunk in chunks), match_event_handler=on_match)
+        return [ResponseValidator.parse_response(r) if k in candidates else None
+                for k, r in enumerate(llm_responses)]
 
 def get_fallback_response(
     risk: float,
@@ -105,7 +189,10 @@ def enhanced_decision_making_llm(
     """
     Enhanced version of decision_making_llm with response validation and fallback.
     """
-    global current_maneuver
+    current_maneuver = _MANEUVER.get()
+    
+    # Imported here so the validator can be used without the legacy LLM module
+    from src.decision_making.decision_makingllm1 import decision_making_llm
     
     # Original LLM call
     llm_response = decision_making_llm(risk, distance, rel_bearing, dcpa, tcpa, idx)
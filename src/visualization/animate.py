@@ -1,7 +1,31 @@
 import time
+import numpy as np
 import matplotlib.pyplot as plt
 from src.visualization.rendering import animate_ship, animate_static_obstacle
 
+# Risk thresholds and the obstacle colour of each risk band
+_THRESH = np.array([0.35, 0.6, 0.75])
+_COLORS = np.array([
+    [0.0, 0.7, 0.0],
+    [1.0, 0.9, 0.0],
+    [1.0, 0.6, 0.0],
+    [1.0, 0.0, 0.0]
+])
+
+# Define colors for ships
+_SHIP_COLORS = [
+    [0, 0, 1],  # Blue
+    [1, 0.5, 0],  # Orange
+    [0, 1, 0]   # Green
+]
+
+def _refresh_canvas():
+    """Redraw the current figure and process GUI events, without sleeping like plt.pause.
+    The window must already be shown (run_simulation calls plt.show(block=False))."""
+    canvas = plt.gcf().canvas
+    canvas.draw_idle()
+    canvas.flush_events()
+
 # Function to animate ship and obstacles
 
 def animate_step(x, y, psi, LOA_own, BOL_own, CPA_own, Xob, Yob, psiob, LOA_ob, BOL_ob, CPA_ob, Risk, Vob, step, l):
@@ -13,38 +37,21 @@ def animate_step(x, y, psi, LOA_own, BOL_own, CPA_own, Xob, Yob, psiob, LOA_ob,
         #plt.ylabel(r'$Y$ (nmi)', fontsize=20)  # Set y-axis label
         #plt.xlim(15, 20)
         #plt.ylim(-5, 2)
-        plt.draw()  # Update the plot
-        plt.pause(0.1)  
 
 
     # Uncomment this section if you want to handle obstacles
     if step % 400 == 0:
-        for j in range(len(Xob)):
-            obs_col = [0.0, 0.7, 0.0]
-            if Risk[j] > 0.75:
-                obs_col = [1.0, 0.0, 0.0]
-            elif Risk[j] > 0.6:
-                obs_col = [1.0, 0.6, 0.0]
-            elif Risk[j] > 0.35:
-                obs_col = [1.0, 0.9, 0.0]
-
-            if Vob[j] > 0.5:
-                if step % 100 == 0:
-                    # Define colors for ships
-                    colors = [
-                        [0, 0, 1],  # Blue
-                        [1, 0.5, 0],  # Orange
-                        [0, 1, 0]   # Green
-                    ]
-                    
-                    animate_ship(Xob[j], Yob[j], psiob[j], LOA_ob[j] * 3, BOL_ob[j] * 3, CPA_ob[j], colors[j])
-                    
-                    
-
-                    
-
-                    plt.draw()  # Update the plot
-                    plt.pause(0.1)  
-                            
-            else:
-                animate_static_obstacle(Xob[j], Yob[j], CPA_ob[j], obs_col)
\ No newline at end of file
+        # Colour by risk level: green, yellow (> 0.35), orange (> 0.6), red (> 0.75)
+        risk_level = np.digitize(np.nan_to_num(np.asarray(Risk, dtype=float)), _THRESH, right=True)
+        obs_cols = _COLORS[risk_level]
+        moving = np.asarray(Vob) > 0.5
+
+        for j in np.flatnonzero(moving):
+            animate_ship(Xob[j], Yob[j], psiob[j], LOA_ob[j] * 3, BOL_ob[j] * 3, CPA_ob[j], _SHIP_COLORS[j])
+
+        for j in np.flatnonzero(~moving):
+            animate_static_obstacle(Xob[j], Yob[j], CPA_ob[j], obs_cols[j])
+
+    # One redraw per frame, after all patches of this step have been added
+    if step % 100 == 0:
+        _refresh_canvas()